@@ -4,18 +4,64 @@
 '''
 
 from pathlib import Path
+from collections import Counter
+from typing import Iterable, Tuple
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.loader import read_input, streamLines
+
+# NumPy is optional, without it we just fall back on the pure Python solvers
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+def parseColumns(inputs) -> Tuple['np.ndarray', 'np.ndarray']:
+    ''' Parse all our inputs into two int64 NumPy columns in one go '''
+
+    # Loader views hand us the whole file at once, otherwise it's a list of lines
+    if hasattr(inputs, 'content'):
+        text = str(inputs.content(), 'utf-8')
+    else:
+        text = '\n'.join(inputs)
+
+    # Whitespace separated, so newlines and spaces both just split numbers
+    nums = np.fromstring(text, dtype=np.int64, sep=' ')
+    return nums[0::2], nums[1::2]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def getDistance(left:'np.ndarray', right:'np.ndarray') -> int:
+    ''' Part 1: sum of differences between our sorted columns '''
+    return int(np.abs(np.sort(left) - np.sort(right)).sum())
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def getSimilarity(left:'np.ndarray', right:'np.ndarray') -> int:
+    '''
+    Part 2: count each distinct right value once, then look every left value up
+    in those counts with a binary search (instead of right.count() per value)
+    '''
+
+    vals, counts = np.unique(right, return_counts=True)
+    if len(vals) == 0:
+        return 0
+
+    # Left values that never show up in the right column count for nothing
+    inds = np.searchsorted(vals, left).clip(max=len(vals) - 1)
+    matches = np.where(vals[inds] == left, counts[inds], 0)
+
+    return int((left * matches).sum())
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
+    if np is not None:
+        return getDistance(*parseColumns(inputs))
+
     # Split numbers into left and right arrays
     left, right  = [], []
     for input in inputs:
@@ -35,9 +81,13 @@ def task_1(inputs):
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
+    if np is not None:
+        return getSimilarity(*parseColumns(inputs))
+
     # Split numbers into left and right arrays
     left, right  = [], []
     for input in inputs:
@@ -45,23 +95,75 @@ def task_2(inputs):
         left.append(int(numList[0]))
         right.append(int(numList[-1]))
 
-    # List.count() method comes very much in handy here
+    # Count the right list up front, rather than right.count() for every number
+    rightCounts = Counter(right)
     out = 0
     for num in left:
-        out += num * right.count(num)
+        out += num * rightCounts[num]
     
     return out
     
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_stream(lines:Iterable[str]) -> Tuple[int, int]:
+    ''' 
+    Solve both parts in a single pass over an iterator of lines. All we keep is
+    the count of each distinct value in each column, so memory grows with the
+    number of distinct values rather than the number of lines
+    '''
+
+    leftCounts, rightCounts = Counter(), Counter()
+    for line in lines:
+        numList = line.split()
+        if not numList:
+            continue
+        leftCounts[int(numList[0])] += 1
+        rightCounts[int(numList[-1])] += 1
+
+    # Part 1: walk both columns' distinct values in sorted order together. The
+    # sorted lists would pair up min(leftNum, rightNum) copies of l and r
+    part1 = 0
+    rights = iter(sorted(rightCounts.items()))
+    r, rightNum = 0, 0
+    for l, leftNum in sorted(leftCounts.items()):
+        while leftNum:
+            if not rightNum:
+                r, rightNum = next(rights)
+            pairs = min(leftNum, rightNum)
+            part1 += pairs * abs(l - r)
+            leftNum -= pairs
+            rightNum -= pairs
+
+    # Part 2: each left value shows up leftCounts[val] times, each one adding val * rightCounts[val]
+    part2 = sum(val * num * rightCounts[val] for val, num in leftCounts.items())
+
+    return part1, part2
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts together, splitting each line into numbers only once '''
+
+    if np is not None:
+        left, right = parseColumns(inputs)
+        return getDistance(left, right), getSimilarity(left, right)
+
+    return solve_stream(inputs)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file (or "-" for stdin), stream it through in a single pass instead
+    if len(sys.argv) > 1:
+        for answer in solve_stream(streamLines(sys.argv[1])):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day01', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day01')
 
     return
 
@@ -4,13 +4,19 @@
 '''
 
 from pathlib import Path
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.loader import read_input, streamLines
+
+# NumPy is optional, without it solve_both just checks one report at a time
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def isLineSafe(line):
@@ -24,6 +30,7 @@ def isLineSafe(line):
     return all([1 <= x <= 3 for x in diff]) or all([-3 <= x <= -1 for x in diff])
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
@@ -37,31 +44,45 @@ def task_1(inputs):
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def partTwoIsSafe(line):
+def isSafeSkipping(line:List[int], skip:int, sign:int) -> bool:
+    ''' Is line safe going in direction sign (+1 up, -1 down) once line[skip] is removed '''
 
-    # Prune off any cases with multiple instances of repeat values
-    if abs(len(set(line)) - len(line)) > 1:
-        return False
+    prev = None
+    for i, val in enumerate(line):
+        if i == skip:
+            continue
+        if prev is not None and not 1 <= (val - prev) * sign <= 3:
+            return False
+        prev = val
 
-    # Get our differences between each value
-    diff = []
-    for i in range(len(line)-1):
-        diff.append(line[i+1] - line[i])
+    return True
 
-    # If all of our differences are in the appropriate range, then already safe
-    if all([1 <= x <= 3 for x in diff]) or all([-3 <= x <= -1 for x in diff]):
-        return True
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def partTwoIsSafe(line:List[int]) -> bool:
+    '''
+    Safe with at most one value removed, in O(n). For each direction, find the
+    first pair of neighbors that breaks the rules. Whatever we remove has to be
+    one of those two values (otherwise they're still neighbors), so those are
+    the only two removals worth trying
+    '''
+
+    for sign in (1, -1):
+
+        # Find the first bad pair, if there isn't one we're already safe
+        for i in range(len(line)-1):
+            if not 1 <= (line[i+1] - line[i]) * sign <= 3:
+                break
+        else:
+            return True
 
-    # Otherwise, lets just brute force removing a single value at a time and
-    # see if any of those combinations are safe
-    for i in range(len(line)):
-        if isLineSafe(line[:i] + line[i+1:]):
+        if isSafeSkipping(line, i, sign) or isSafeSkipping(line, i+1, sign):
             return True
 
     # If nothing is safe at this point, return false
     return False
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
@@ -74,16 +95,100 @@ def task_2(inputs):
 
     return out
     
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_stream(lines:Iterable[str]) -> Tuple[int, int]:
+    ''' Solve both parts in a single pass, one report in memory at a time '''
+
+    part1, part2 = 0, 0
+    for input in lines:
+        if not input:
+            continue
+        line = [int(x) for x in input.split(' ')]
+        if isLineSafe(line):
+            part1 += 1
+            part2 += 1
+        elif partTwoIsSafe(line):
+            part2 += 1
+
+    return part1, part2
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def isBatchSafe(levels:'np.ndarray', sign:int) -> 'np.ndarray':
+    ''' Which rows of a 2D array of equal-length reports are safe going in direction sign '''
+    diffs = np.diff(levels, axis=1) * sign
+    return ((diffs >= 1) & (diffs <= 3)).all(axis=1)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def batchSafe(levels:'np.ndarray') -> Tuple[int, int]:
+    '''
+    Same idea as partTwoIsSafe, but for a whole 2D array of equal-length reports
+    at once: find each row's first bad pair, then check just those two removals
+    '''
+
+    B, L = levels.shape
+    safe1 = isBatchSafe(levels, 1) | isBatchSafe(levels, -1)
+
+    # Anything with two or fewer levels is safe once we remove one of them
+    if L <= 2:
+        return int(safe1.sum()), B
+
+    safe2 = safe1.copy()
+
+    # Column indices for each row once one value is removed
+    cols = np.arange(L-1)
+    for sign in (1, -1):
+        diffs = np.diff(levels, axis=1) * sign
+        first = ((diffs < 1) | (diffs > 3)).argmax(axis=1)
+        for skip in (first, first + 1):
+            keep = cols + (cols >= skip[:, None])
+            safe2 |= isBatchSafe(np.take_along_axis(levels, keep, axis=1), sign)
+
+    return int(safe1.sum()), int(safe2.sum())
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_batched(inputs) -> Tuple[int, int]:
+    ''' Group reports by length and check each group as one NumPy array '''
+
+    groups = defaultdict(list)
+    for input in inputs:
+        if not input:
+            continue
+        line = [int(x) for x in input.split(' ')]
+        groups[len(line)].append(line)
+
+    part1, part2 = 0, 0
+    for lines in groups.values():
+        safe1, safe2 = batchSafe(np.array(lines, dtype=np.int64))
+        part1 += safe1
+        part2 += safe2
+
+    return part1, part2
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts together, parsing and checking each report only once '''
+
+    if np is not None:
+        return solve_batched(inputs)
+
+    return solve_stream(inputs)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file (or "-" for stdin), stream it through in a single pass instead
+    if len(sys.argv) > 1:
+        for answer in solve_stream(streamLines(sys.argv[1])):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day02', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day02')
 
     return
 
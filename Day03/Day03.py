@@ -4,71 +4,203 @@
 '''
 
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from typing import Iterable, Iterator, List, Optional, Tuple
+import os
 import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.loader import CHUNK_SIZE, mapFile, read_input, streamChunks
+
+'''
+    Regular expressions ftw! Thanks to references like:
+    https://www.geeksforgeeks.org/python-regex-cheat-sheet/
+
+    Match anything like "mul(x,y)", "do()", or "don't()", capturing x and y so
+    we never have to split the match back apart. Every token starts with an "m"
+    or a "d" and never has another "m" or "d" inside it, which is what lets us
+    cut our input up right before any "m" or "d" without breaking a token
+'''
+TOKENS = re.compile(rb"mul\((\d+),(\d+)\)|(do\(\))|don't\(\)")
+
+# Anything that could still turn into a token if more input showed up
+PARTIAL = re.compile(rb"m(?:u(?:l(?:\((?:\d+(?:,\d*)?)?)?)?)?|d(?:o(?:n(?:'(?:t\(?)?)?|\()?)?")
+
+'''
+    Everything we need to know about one span of input, without knowing what
+    came before it: (sum of all muls, sum of enabled muls if we start in a
+    "do()" state, same but starting in a "don't()" state, our state at the end
+    or None if the span never changes it). Spans combine left to right, so the
+    spans can be scanned in any order (or in parallel) and stitched afterwards
+'''
+Summary = Tuple[int, int, int, Optional[bool]]
+EMPTY = (0, 0, 0, None)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+def evalSpan(buf, start:int, end:int) -> Summary:
+    ''' Scan buf[start:end] for tokens, for both possible starting states at once '''
+
+    # Until we hit our first do()/don't(), the enabled sum depends on the start
+    part1, lead, tail = 0, 0, 0
+    iDo = None
+    for x, y, do in TOKENS.findall(buf, start, end):
+        if x:
+            val = int(x) * int(y)
+            part1 += val
+            if iDo is None:
+                lead += val
+            elif iDo:
+                tail += val
+        else:
+            iDo = bool(do)
+
+    return part1, lead + tail, tail, iDo
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def expr2val(match:str) -> int:
-    ''' If we have a match string like "mul(x,y)", return the value of x * y '''
-    return int(match.split('(')[1].split(',')[0]) * int(match.split(',')[1].split(')')[0])
+def combine(first:Summary, second:Summary) -> Summary:
+    ''' Summary of first's span followed directly by second's span '''
+
+    part1, ifOn, ifOff, state = first
+    part1b, ifOnB, ifOffB, stateB = second
+
+    # Whatever state first leaves us in picks which of second's sums we get
+    afterOn = state if state is not None else True
+    afterOff = state if state is not None else False
+
+    return (part1 + part1b,
+            ifOn + (ifOnB if afterOn else ifOffB),
+            ifOff + (ifOnB if afterOff else ifOffB),
+            stateB if stateB is not None else state)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def task_1(inputs):
-    ''' Solve part 1 '''
+def splitPoints(buf, start:int, end:int, size:int) -> List[int]:
+    '''
+    Offsets to cut buf[start:end] into spans of roughly size bytes. Each cut gets
+    nudged forward to the next "m" or "d", so no token ever gets split in two
+    '''
+
+    points = [start]
+    for pos in range(start + size, end, size):
+        pos = max(pos, points[-1])
+        nexts = [i for i in (buf.find(b'm', pos, end), buf.find(b'd', pos, end)) if i != -1]
+        points.append(min(nexts) if nexts else end)
+    points.append(end)
+
+    return points
 
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_chunks(chunks:Iterable[bytes]) -> Tuple[int, int]:
     '''
-        Regular expressions ftw! Thanks to references like:
-        https://www.geeksforgeeks.org/python-regex-cheat-sheet/
+    Solve both parts over a stream of arbitrarily split byte chunks, keeping a
+    running sum and our "do()" state. If a chunk ends partway through what could
+    still be a token, that tail gets carried over to the front of the next chunk
     '''
-    out = 0
-    pattern = 'mul\(\d+,\d+\)'
+
+    summary = EMPTY
+    carry = b''
+    for chunk in chunks:
+        buf = carry + chunk
+
+        # Only the tail after the last "m" or "d" can be an unfinished token
+        cut = max(buf.rfind(b'm'), buf.rfind(b'd'))
+        if cut == -1 or not PARTIAL.fullmatch(buf, cut):
+            cut = len(buf)
+
+        summary = combine(summary, evalSpan(buf, 0, cut))
+        carry = buf[cut:]
+
+    # Whatever is left over never got finished, so it can't be a token. We
+    # start out in a "do()" state, so part 2 is the ifOn sum
+    return summary[0], summary[1]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def evalFileSpan(infile, start:int, end:int) -> Summary:
+    ''' Worker job: map the file ourselves and scan our span a chunk at a time '''
+
+    buf = mapFile(infile)
+    points = splitPoints(buf, start, end, CHUNK_SIZE)
+    return reduce(combine, (evalSpan(buf, a, b) for a, b in zip(points, points[1:])), EMPTY)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_parallel(infile, workers:int) -> Tuple[int, int]:
+    '''
+    Solve both parts of a big input file across worker processes. Each worker
+    gets one span of the file and hands back its Summary for both starting
+    states, then we stitch the summaries back together in order
+    '''
+
+    buf = mapFile(infile)
+    points = splitPoints(buf, 0, len(buf), -(-len(buf) // workers) or 1)
+    spans = list(zip(points, points[1:]))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summaries = pool.map(evalFileSpan, [infile] * len(spans), *zip(*spans))
+        summary = reduce(combine, summaries, EMPTY)
+
+    return summary[0], summary[1]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def iterChunks(inputs, size:int=CHUNK_SIZE) -> Iterator[bytes]:
+    ''' Our inputs as byte chunks, straight out of the mapped file if we can '''
+
+    if hasattr(inputs, 'content'):
+        content = inputs.content()
+        for start in range(0, len(content), size):
+            yield content[start:start+size]
+        return
+
     for input in inputs:
-        matches = re.findall(pattern, input)
-        for match in matches:
-            out += expr2val(match)
+        yield input.encode() + b'\n'
 
-    return out
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
+def task_1(inputs):
+    ''' Solve part 1 '''
+    return solve_chunks(iterChunks(inputs))[0]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
-    # Now match anything like "mul(x,y)", "don't()", or "do()"
-    total_matches = []
-    pattern = "mul\(\d+,\d+\)|do\(\)|don't\(\)"
-    for input in inputs:
-        matches = re.findall(pattern, input)
-        total_matches += matches
-        
-    # Only add our match if we are currently in a "do()" state
-    out = 0
-    iDo = True
-    for match in total_matches:
-        if 'mul' in match and iDo:
-            out += expr2val(match)
-        elif match == "don't()":
-            iDo = False
-        elif match == "do()":
-            iDo = True
-
-    return out
-    
+    # Only count our mul's while we are in a "do()" state
+    return solve_chunks(iterChunks(inputs))[1]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_stream(lines:Iterable[str]) -> Tuple[int, int]:
+    ''' Solve both parts in a single pass, keeping our "do()" state across lines '''
+    return solve_chunks(line.encode() + b'\n' for line in lines)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts together, scanning our input for tokens only once '''
+    return solve_chunks(iterChunks(inputs))
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file (or "-" for stdin), stream it through in fixed-size chunks
+    # instead. Given a number of workers too, split the file up across them
+    if len(sys.argv) > 2 and sys.argv[1] != '-':
+        workers = int(sys.argv[2]) or os.cpu_count()
+        for answer in solve_parallel(sys.argv[1], workers):
+            print(answer)
+        return
+    if len(sys.argv) > 1:
+        for answer in solve_chunks(streamChunks(sys.argv[1])):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day03', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day03')
 
     return
 
@@ -4,111 +4,215 @@
 '''
 
 from pathlib import Path
-from typing import List
+from collections import deque
+from typing import Dict, Iterable, Tuple
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.grid import Grid
+from utils.loader import readGrid as read_input
+
+# NumPy is optional, without it we fall back on the pure Python searches
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+WORD = b'XMAS'
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+def shifted(cells:'np.ndarray', grid:Grid, offset:int) -> 'np.ndarray':
+    '''
+    View of our cells, shifted by offset, lined up against every cell from the
+    first row to the last. The rows' padding rides along too, but a SENTINEL
+    never matches a letter, so we don't need to bother cutting it out
+    '''
+    start, stop = grid.index(0, 0), grid.index(grid.M - 1, grid.N)
+    return cells[start+offset:stop+offset]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def coordInGrid(r, c, M, N) -> bool:
-    ''' Is our current (row, col) coordinate within our grid '''
-    return 0 <= r< M and 0 <= c < N
+def countXmasNumpy(grid:Grid) -> int:
+    '''
+    Same as countXmas, but one whole-grid boolean mask per direction: a cell
+    starts an "XMAS" if it's an "X", the cell one step over is an "M", etc.
+    Needs grid.pad >= len(WORD) - 1 so no shift ever runs off our array
+    '''
+
+    cells = np.frombuffer(grid.cells, dtype=np.uint8)
+
+    out = 0
+    for direction in grid.DIRS8:
+        mask = shifted(cells, grid, 0) == WORD[0]
+        for k in range(1, len(WORD)):
+            mask &= shifted(cells, grid, k * direction) == WORD[k]
+        out += int(np.count_nonzero(mask))
+
+    return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def checkDirection(direction, inputs, r, c, M, N) -> bool:
-    ''' 
-    Given a starting point (r,c) and a direction (e.g., left, up, diag, etc.), is
-    this a valid "XMAS" string
+class WordSearch():
     '''
+    Aho-Corasick automaton for finding a whole set of words at once. Every word
+    goes in forwards and backwards, so scanning a line left to right also finds
+    the words written right to left. The automaton is flattened into a full
+    transition table (state x byte -> state), so a scan is one table lookup per
+    cell, no matter how many words we're looking for.
+    '''
+
+    def __init__(self, words:Iterable[str]):
+
+        # Trie of every word and every reversed word. outputs[state] lists which
+        # words end at that state (a palindrome ends there twice, since it really
+        # does show up once in each direction)
+        self.words = list(dict.fromkeys(word for word in words if word))
+        trie, self.outputs = [{}], [[]]
+        for w, word in enumerate(self.words):
+            for pattern in (word.encode(), word[::-1].encode()):
+                state = 0
+                for ch in pattern:
+                    if ch not in trie[state]:
+                        trie[state][ch] = len(trie)
+                        trie.append({})
+                        self.outputs.append([])
+                    state = trie[state][ch]
+                self.outputs[state].append(w)
+
+        # Breadth first, so each state's fail state (the longest proper suffix
+        # that's also in our trie) is always finished before we need it
+        fail = [0] * len(trie)
+        self.table = [None] * len(trie)
+        self.table[0] = [trie[0].get(ch, 0) for ch in range(256)]
+        queue = deque(trie[0].values())
+        while queue:
+            state = queue.popleft()
+            row = list(self.table[fail[state]])
+            for ch, child in trie[state].items():
+                if state:
+                    fail[child] = self.table[fail[state]][ch]
+                    self.outputs[child] = self.outputs[child] + self.outputs[fail[child]]
+                row[ch] = child
+                queue.append(child)
+            self.table[state] = row
+
+    def countIn(self, grid:Grid) -> Dict[str, int]:
+        '''
+        Count every word in our grid, in all 8 directions. Walking the flat cells
+        with a stride of 1, W, W+1 or W-1 covers every row, column and diagonal,
+        and the padding drops a SENTINEL between any two of them, which sends us
+        back to the root state
+        '''
+
+        # Count how often we land on each state, then credit the words after
+        table = self.table
+        hits = [0] * len(table)
+        for stride in (grid.RIGHT, grid.DOWN, grid.DOWN + grid.RIGHT, grid.DOWN + grid.LEFT):
+            for start in range(stride):
+                state = 0
+                for ch in grid.cells[start::stride]:
+                    state = table[state][ch]
+                    hits[state] += 1
+
+        counts = dict.fromkeys(self.words, 0)
+        for state, num in enumerate(hits):
+            for w in self.outputs[state]:
+                counts[self.words[w]] += num
+
+        return counts
 
-    LETTERS = 'XMAS'
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def countWords(inputs, words:Iterable[str]) -> Dict[str, int]:
+    ''' Hashmap of word -> how many times it shows up in our grid, in any direction '''
+    return WordSearch(words).countIn(Grid(inputs))
 
-    for i, letter in enumerate(LETTERS):
-        if coordInGrid(r, c, M, N) and inputs[r][c] == letter:
-            r += direction[0]
-            c += direction[1]
-        else:
-            return False
-        
-    return True
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def countXmas(grid:Grid) -> int:
+    ''' Count every "XMAS" string in our grid, in any of the 8 directions '''
+    word = WORD.decode()
+    return WordSearch([word]).countIn(grid)[word]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
-    # Matrix dimension
-    M = len(inputs)
-    N = len(inputs[0])
+    if np is not None:
+        return countXmasNumpy(Grid(inputs, pad=len(WORD)-1))
 
-    # All possible directions to search
-    DIRECTIONS = {
-        (-1, 0), (-1, +1), (0, +1), (+1, +1), (+1, 0), (+1, -1), (0, -1), (-1, -1)
-    }
+    return countXmas(Grid(inputs))
 
-    # Check each (row,col) starting point. For each starting point, check each direction
-    out = 0
-    for r in range(M):
-        for c in range(N):
-            for direction in DIRECTIONS:
-                if checkDirection(direction, inputs, r, c, M, N):
-                    out += 1
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def isXMas(grid:Grid, i:int) -> bool:
+    ''' 
+    Ugly helper logic - given the center index of a 3x3 subarray, returns True if 
+    two adjacent corners contain "M" and the other two contain "S", False otherwise
+    '''
 
-    return out
+    # Corners in clockwise order: topleft, topright, botright, botleft
+    corners = bytes((grid.cells[i + grid.UP + grid.LEFT], grid.cells[i + grid.UP + grid.RIGHT],
+                     grid.cells[i + grid.DOWN + grid.RIGHT], grid.cells[i + grid.DOWN + grid.LEFT]))
+
+    # Two adjacent M's then two adjacent S's, starting from any corner
+    return corners in {b'MMSS', b'SMMS', b'SSMM', b'MSSM'}
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def helper(arr:List[str], instr:str) -> str:
-    ''' Given a 3x3 subarray, return the character in the specified corner '''
-    mapping = {
-        'topleft' : arr[0][0],
-        'topright': arr[0][2],
-        'botleft' : arr[2][0],
-        'botright': arr[2][2]
-    }
-    return mapping[instr]
+def countCrossMas(grid:Grid) -> int:
+    ''' Count every X-MAS (two "MAS" strings crossing at the "A") in our grid '''
+
+    A = ord('A')
+
+    # For each index as the center of a 3x3 subarray, check if that subarray
+    # fulfills our X-MAS subarray specification. Centers on the edge of the grid
+    # have SENTINEL corners, so they just never match
+    out = 0
+    for i in grid.indices():
+        if grid.cells[i] == A and isXMas(grid, i):
+            out += 1
+
+    return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def isXMas(arr:List[str]) -> bool:
-    ''' 
-    Ugly helper logic - given a 3x3 subarray, returns True if two adjacent corners
-    contain "M" and the other two contain "S", False otherwise
+def countCrossMasNumpy(grid:Grid) -> int:
+    '''
+    Same as countCrossMas, but with whole-grid masks: each diagonal through an
+    "A" has to have an "M" on one end and an "S" on the other (which covers all
+    four orientations of the X-MAS)
     '''
-    return (
-        (helper(arr,'topleft') == helper(arr,'topright') == 'M' and
-         helper(arr,'botleft') == helper(arr,'botright') == 'S') 
-         or
-        (helper(arr,'topright') == helper(arr,'botright') == 'M' and
-         helper(arr,'topleft') == helper(arr,'botleft') == 'S') 
-         or
-        (helper(arr,'botleft') == helper(arr,'botright') == 'M' and
-         helper(arr,'topleft') == helper(arr,'topright') == 'S') 
-         or 
-        (helper(arr,'botleft') == helper(arr,'topleft') == 'M' and
-         helper(arr,'botright') == helper(arr,'topright') == 'S')
-    )
+
+    M, A, S = b'MAS'
+    cells = np.frombuffer(grid.cells, dtype=np.uint8)
+    topLeft, botRight = (shifted(cells, grid, grid.UP + grid.LEFT),
+                         shifted(cells, grid, grid.DOWN + grid.RIGHT))
+    topRight, botLeft = (shifted(cells, grid, grid.UP + grid.RIGHT),
+                         shifted(cells, grid, grid.DOWN + grid.LEFT))
+
+    mask = shifted(cells, grid, 0) == A
+    mask &= ((topLeft == M) & (botRight == S)) | ((topLeft == S) & (botRight == M))
+    mask &= ((topRight == M) & (botLeft == S)) | ((topRight == S) & (botLeft == M))
+
+    return int(np.count_nonzero(mask))
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
-    # Matrix dimensions
-    M = len(inputs)
-    N = len(inputs[0])
+    if np is not None:
+        return countCrossMasNumpy(Grid(inputs))
 
-    # For each (r,c) coordinate as the center of a 3x3 subarray, check if that
-    # subarray fulfills our X-MAS subarray specification
-    out = 0
-    for r in range(1, M-1):
-        for c in range(1, N-1):
-            if inputs[r][c] == 'A':
-                subarray = [row[c-1:c+2] for row in inputs[r-1:r+2]]
-                if isXMas(subarray):
-                    out += 1
+    return countCrossMas(Grid(inputs))
 
-    return out
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, building our grid only once '''
+
+    if np is not None:
+        grid = Grid(inputs, pad=len(WORD)-1)
+        return countXmasNumpy(grid), countCrossMasNumpy(grid)
+
+    grid = Grid(inputs)
+    return countXmas(grid), countCrossMas(grid)
     
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
@@ -116,10 +220,9 @@ def main():
     infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_1(inputs))
-
-    inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day04', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day04')
 
     return
 
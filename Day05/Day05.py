@@ -4,14 +4,113 @@
 '''
 
 from pathlib import Path
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Set, Tuple
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.loader import read_input
+
+# Bump this whenever parsing changes, so stale cache entries get ignored
+CACHE_VERSION = 1
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+class RuleBook():
+    '''
+    Our rules, compiled once into a frozen form that can be shared by everything
+    checking updates against them (including worker processes). Every page gets
+    a dense ID, and the set of pages each page has to come before is a single
+    int bitset over those IDs.
+
+    An update is valid as long as no page has to come before a page we've
+    already seen, which is one AND against a running bitset of seen pages. A
+    page that isn't in any rule has no ID, so it never breaks a rule. To fix an
+    update, a page's rank is how many of the other pages it has to come before,
+    which for our inputs (a rule for every pair) is its place in the order
+    '''
+
+    __slots__ = ('ids', 'before')
+
+    def __init__(self, rules:Dict[int, Set[int]]):
+        pages = sorted(set(rules).union(*rules.values()))
+        ids = {page: i for i, page in enumerate(pages)}
+
+        before = [0] * len(pages)
+        for x, ys in rules.items():
+            for y in ys:
+                before[ids[x]] |= 1 << ids[y]
+
+        self.ids = ids
+        self.before = tuple(before)
+
+    def isValid(self, update:List[int]) -> bool:
+        ''' Does this update break none of our rules '''
+
+        ids, before = self.ids, self.before
+        seen = 0
+        for page in update:
+            i = ids.get(page)
+            if i is None:
+                continue
+
+            # Any page we've already seen that this one has to come before?
+            if before[i] & seen:
+                return False
+            seen |= 1 << i
+
+        return True
+
+    def getRanks(self, update:List[int]) -> Dict[int, int]:
+        ''' Hashmap of page -> how many other pages in this update it has to come before '''
+
+        ids, before = self.ids, self.before
+        mask = 0
+        for page in update:
+            if page in ids:
+                mask |= 1 << ids[page]
+
+        return {page: (before[ids[page]] & mask).bit_count() if page in ids else 0
+                for page in update}
+
+    def fix(self, update:List[int]) -> List[int]:
+        ''' Given a non-rule-abiding update, sort it in proper order to follow rules '''
+
+        # Whichever page has to come before the most other pages goes first
+        ranks = self.getRanks(update)
+        return sorted(update, key=ranks.__getitem__, reverse=True)
+
+    def fixedMiddle(self, update:List[int]) -> int:
+        ''' Middle page of the fixed update, without sorting it if we don't have to '''
+
+        # If every rank is different, the rules give these pages a single order,
+        # and the middle page is the one with exactly this many pages after it
+        ranks = self.getRanks(update)
+        if len(set(ranks.values())) == len(ranks):
+            target = len(update) - 1 - len(update) // 2
+            for page, rank in ranks.items():
+                if rank == target:
+                    return page
+
+        # Otherwise (e.g., pages with no rules), go with whatever fix() gives us
+        return self.fix(update)[len(update) // 2]
+
+    def checkAll(self, updates:Iterable[List[int]]) -> Tuple[int, int]:
+        '''
+        Run a whole stream of updates through our rules: middle pages of the valid
+        ones summed up for part 1, and middle pages of the fixed ones for part 2
+        '''
+
+        part1, part2 = 0, 0
+        for update in updates:
+            if self.isValid(update):
+                part1 += update[len(update) // 2]
+            else:
+                part2 += self.fixedMiddle(update)
+
+        return part1, part2
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 class InputsObj():
@@ -19,9 +118,10 @@ class InputsObj():
     def __init__(self, rules:map, updates:List[List[int]]):
         self.rules = rules
         self.updates = updates
+        self.ruleBook = RuleBook(rules)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def parseInputs(inputs) -> InputsObj:
+def parseRulesAndUpdates(inputs) -> Tuple[Dict[int, Set[int]], List[List[int]]]:
     ''' do some initial pre-processing of our inputs'''
 
     # Iterate through the first section of our inputs
@@ -46,21 +146,18 @@ def parseInputs(inputs) -> InputsObj:
     for input in inputs[indSecond:]:
         updates.append([int(val) for val in input.split(',')])
 
-    return InputsObj(rules, updates)
+    return rules, updates
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def rulesHold(rules, update):
-    ''' For a given "update", check if it abides by our mapping of rules '''
-
-    for x in range(len(update)-1):
-        for y in range(x+1, len(update)):
-            if ((update[x] in rules and update[y] not in rules[update[x]]) or 
-                (update[y] in rules and update[x] in rules[update[y]])):
-                return False
-            
-    return True
+@profiling.timed('parse')
+def parseInputs(inputs) -> InputsObj:
+    ''' Our pre-processed inputs, straight from the parse cache if we've seen them before '''
+    rules, updates = cached('Day05.parseInputs', CACHE_VERSION, inputs, 
+                            lambda: parseRulesAndUpdates(inputs))
+    return InputsObj(rules, updates)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
@@ -70,29 +167,13 @@ def task_1(inputs):
 
     # For each update that abides by our rules, add its middle number to output 
     for update in inputsObj.updates:
-        if rulesHold(inputsObj.rules, update):
+        if inputsObj.ruleBook.isValid(update):
             out += update[int(len(update)/2)]
     
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getFixedUpdate(rules, update):
-    ''' Given a non-rule-abiding update, sort it in proper order to follow rules '''
-
-    # Iterate through each value in our original update...
-    newUpdate = []
-    for val in update:
-
-        # For each value, try putting it in each index of our array until it 
-        # passes the rule check
-        for i in range(len(newUpdate)+1):
-            if rulesHold(rules, newUpdate[:i] + [val] + newUpdate[i:]):
-                newUpdate.insert(i, val)
-                break
-    
-    return newUpdate
-
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
@@ -102,22 +183,65 @@ def task_2(inputs):
 
     # For each update that DOES NOT abide by our rules, fix it and add middle number
     for update in inputsObj.updates:
-        if not rulesHold(inputsObj.rules, update):
-            fixedUpdate = getFixedUpdate(inputsObj.rules, update)
-            out += fixedUpdate[int(len(fixedUpdate)/2)]
+        if not inputsObj.ruleBook.isValid(update):
+            out += inputsObj.ruleBook.fixedMiddle(update)
 
     return out
     
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, parsing once and checking each update's rules only once '''
+
+    # Valid updates count towards part 1, the rest get fixed for part 2
+    inputsObj = parseInputs(inputs)
+    return inputsObj.ruleBook.checkAll(inputsObj.updates)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+_ruleBook = None
+def initWorker(ruleBook:RuleBook):
+    ''' Each worker process gets the compiled rules once, up front '''
+    global _ruleBook
+    _ruleBook = ruleBook
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def checkBatch(updates:List[List[int]]) -> Tuple[int, int]:
+    ''' Worker job: check one batch of updates against the shared rules '''
+    return _ruleBook.checkAll(updates)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_parallel(inputs, workers:int) -> Tuple[int, int]:
+    ''' Solve both parts, spreading batches of updates across worker processes '''
+
+    inputsObj = parseInputs(inputs)
+    updates = inputsObj.updates
+
+    # A few batches per worker, so one slow batch doesn't hold everyone up
+    size = max(1, -(-len(updates) // (4 * workers)))
+    batches = [updates[i:i+size] for i in range(0, len(updates), size)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initWorker,
+                             initargs=(inputsObj.ruleBook,)) as pool:
+        results = list(pool.map(checkBatch, batches))
+
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file and a number of workers, check its updates in parallel instead
+    if len(sys.argv) > 2:
+        workers = int(sys.argv[2]) or os.cpu_count()
+        for answer in solve_parallel(read_input(sys.argv[1]), workers):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day05', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day05')
 
     return
 
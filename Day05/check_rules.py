@@ -0,0 +1,96 @@
+'''
+    What: Advent of Code 2024 - Day 05 RuleBook check
+    Who: Josh Geiser
+
+    Usage: python Day05/check_rules.py [--trials N] [--seed N]
+
+    Checks RuleBook against a brute force rule check over every pair of pages,
+    on a few hand picked inputs and a bunch of random ones
+'''
+
+from pathlib import Path
+from typing import Dict, List, Set
+import argparse
+import random
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from Day05 import RuleBook, parseRulesAndUpdates, solve_both, task_1, task_2
+
+# (inputs, (part1, part2)). Pages 4-7 aren't in any rule, so they can't break one
+EXAMPLES = [
+    (['1|2', '2|3', '1|3', '', '1,2,3', '4,5,6', '1,7,2'], (14, 0)),
+    (['1|2', '2|3', '1|3', '', '3,2,1', '4,5,6', '2,7,1'], (5, 4)),
+]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def bruteValid(rules:Dict[int, Set[int]], update:List[int]) -> bool:
+    ''' No page has to come before any page earlier in the update '''
+
+    for x in range(len(update)-1):
+        for y in range(x+1, len(update)):
+            if update[x] in rules.get(update[y], ()):
+                return False
+
+    return True
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def checkTrial(rng:random.Random):
+    ''' Random rules (every pair, or only some) and random updates against them '''
+
+    # Rules all follow one secret order, so a valid fix always exists
+    order = rng.sample(range(10, 100), rng.randint(2, 12))
+    everyPair = rng.random() < 0.5
+    rules = {}
+    for x in range(len(order)-1):
+        for y in range(x+1, len(order)):
+            if everyPair or rng.random() < 0.5:
+                rules.setdefault(order[x], set()).add(order[y])
+
+    ruleBook = RuleBook(rules)
+    for _ in range(20):
+        update = rng.sample(order + [1, 2, 3], rng.randint(1, len(order)))
+        if ruleBook.isValid(update) != bruteValid(rules, update):
+            raise SystemExit(f'isValid mismatch for {update} with rules {rules}')
+
+        # Only with a rule for every pair is the fixed order the one true order
+        if everyPair and all(page in order for page in update):
+            fixed = sorted(update, key=order.index)
+            if ruleBook.fixedMiddle(update) != fixed[len(fixed) // 2]:
+                raise SystemExit(f'fixedMiddle mismatch for {update} with rules {rules}')
+            if not ruleBook.isValid(ruleBook.fix(update)):
+                raise SystemExit(f'fix() left {update} breaking rules {rules}')
+
+    return
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def main():
+
+    parser = argparse.ArgumentParser(description='Check RuleBook against a brute force rule check')
+    parser.add_argument('--trials', type=int, default=500, help='number of random rule sets')
+    parser.add_argument('--seed', type=int, default=5, help='random seed')
+    args = parser.parse_args()
+
+    for inputs, expected in EXAMPLES:
+        rules, updates = parseRulesAndUpdates(inputs)
+        got = {
+            'task_1/task_2': (task_1(inputs), task_2(inputs)),
+            'solve_both': solve_both(inputs),
+            'checkAll': RuleBook(rules).checkAll(updates),
+        }
+        for name, answers in got.items():
+            if tuple(answers) != expected:
+                raise SystemExit(f'{name} gave {answers} for {inputs}, expected {expected}')
+
+    rng = random.Random(args.seed)
+    for _ in range(args.trials):
+        checkTrial(rng)
+
+    print(f'OK: {len(EXAMPLES)} examples, {args.trials} random rule sets')
+
+    return
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+if __name__ == '__main__':
+    main()
@@ -4,182 +4,275 @@
 '''
 
 from pathlib import Path
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+import os
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
-
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Coord():
-    ''' Helper class for giving us a coordinate on our grid '''
-    def __init__(self, r, c):
-        self.r = r
-        self.c = c
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.grid import SENTINEL, Grid
+from utils.loader import readGrid as read_input
 
-    def __str__(self):
-        return f'{self.r}_{self.c}'
+# Cell value for an obstacle
+WALL = ord('#')
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Grid():
-    ''' Helper class for storing properties of our grid '''
+class Lab(Grid):
+    ''' Our grid, plus where the guard starts '''
 
     def __init__(self, grid):
-        self.grid = grid
-        self.M = len(grid)
-        self.N = len(grid[0])
-        self.startPos = None
-
-    def __contains__(self, coord:Coord) -> bool:
-        ''' So that we can do things like: if coord in grid '''
-        return 0 <= coord.r < self.M and 0 <= coord.c < self.N
-    
-    def updateInd(self, r, c, char):
-        ''' Since strings are immutable, have to do some hackier logic '''
-        row = self.grid[r]
-        self.grid[r] = row[:c] + char + row[c+1:]
-        return
-        
+        super().__init__(grid)
+        self.startPos = self.find(b'^')
+        if self.startPos == -1:
+            raise SystemExit()
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Direction():
-    ''' Helper class for what "direction" we are facing '''
-
-    def __init__(self, startDir='UP'):
-        self.DIRS = ['UP', 'RIGHT', 'DOWN', 'LEFT']
-        self.STEP_TO_TAKE = {
-            'UP':       (-1, +0),
-            'RIGHT':    (+0, +1),
-            'DOWN':     (+1, +0),
-            'LEFT':     (+0, -1)
-        }
-        self.facing = startDir
-
-    def __str__(self):
-        return self.facing
-
-    def updateDir(self):
-        ''' Go from UP -> RIGHT -> DOWN -> LEFT '''
-        self.facing = self.DIRS[(self.DIRS.index(self.facing) + 1) % len(self.DIRS)]
-
-    def getStep(self, coord:Coord) -> Coord:
-        ''' Given our current direction and coord, give next potential coord '''
-        dr, dc = self.STEP_TO_TAKE[self.facing]
-        return Coord(coord.r + dr, coord.c + dc)
-
-    def takeStep(self, coord:Coord, grid:Grid) -> Coord:
-        ''' Decide where to take our next step '''
-
-        newCoord = self.getStep(coord)
-
-        # If we're out of bounds, that's ok, we're at the end!
-        if newCoord not in grid:
-            return newCoord
-        
-        # This bug/edge case took me forever to figure out :/ 
-        # have to do a while loop instead of an if for cases like this: 
-        #       .#
-        #       #<
-        while grid.grid[newCoord.r][newCoord.c] == '#':
-            self.updateDir()
-            newCoord = self.getStep(coord)
-
-        return newCoord
-        
+def getJumpTable(grid:Lab) -> List[array]:
+    '''
+    For each facing (same order as grid.DIRS4, which goes UP -> RIGHT -> DOWN ->
+    LEFT, so turning right is just facing + 1), an array mapping every index to
+    where the guard ends up walking straight ahead from there: the cell just
+    before the next obstacle, or the first SENTINEL past the edge if there are
+    no obstacles left in that direction.
+
+    This bug/edge case took me forever to figure out :/ cases like this:
+          .#
+          #<
+    After turning we can be facing another obstacle right away. Then our jump
+    is just zero cells long, and we turn again
+    '''
+
+    cells = grid.cells
+    order = list(grid.indices())
+
+    jumps = []
+    for offset in grid.DIRS4:
+
+        # Sweep against our direction, so the cell ahead of us is always done first
+        jump = array('i', bytes(4 * len(cells)))
+        for i in (order if offset < 0 else reversed(order)):
+            ahead = i + offset
+            if cells[ahead] == WALL:
+                jump[i] = i
+            elif cells[ahead] == SENTINEL:
+                jump[i] = ahead
+            else:
+                jump[i] = jump[ahead]
+        jumps.append(jump)
+
+    return jumps
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getStart(grid:Grid) -> Coord:
-    ''' Figure out where our starting position is. Also update grid with that info '''
-    for r in range(grid.M):
-        for c in range(grid.N):
-            if grid.grid[r][c] == '^':
-                grid.startPos = Coord(r, c) # bad side effect
-                return grid.startPos
-    raise SystemExit()
-    
+def getVisited(grid:Lab, jumps:List[array]) -> bytearray:
+    ''' 
+    Walk the guard until they leave the grid, jumping straight from obstacle to
+    obstacle. Returns a mask with a 1 at each index visited
+    '''
+
+    visited = bytearray(len(grid.cells))
+    curr, facing = grid.startPos, 0
+    while True:
+
+        if profiling.ENABLED:
+            profiling.count('jump')
+
+        # Mark everything from here up to where we stop (or leave the grid)
+        offset = grid.DIRS4[facing]
+        nextPos = jumps[facing][curr]
+        last = nextPos if nextPos in grid else nextPos - offset
+        visited[curr:last+offset:offset] = b'\x01' * ((last - curr) // offset + 1)
+
+        if nextPos not in grid:
+            return visited
+
+        # Otherwise we're facing an obstacle, so turn right
+        curr, facing = nextPos, (facing + 1) % 4
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
-    # Initialize things
-    grid = Grid(inputs)
-    visited = set()
-    currDir = Direction()
-    curr = getStart(grid)
-
-    # Iterate 'til we done
-    while curr in grid:
-        visited.add(str(curr))
-        curr = currDir.takeStep(curr, grid)
+    # Number of indices we marked is simply our answer
+    grid = Lab(inputs)
+    return getVisited(grid, getJumpTable(grid)).count(1)
 
-    # Length of our hashset is simply our answer
-    return len(visited)
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def getFirstStates(grid:Lab, jumps:List[array]) -> Dict[int, int]:
+    '''
+    Walk the guard's original path, returning a hashmap of index -> the guard's
+    state (packed as index * 4 + facing) right before they first step onto it.
+    Putting a blocker there can't change anything the guard did before that, so
+    that's where we can start checking that blocker from
+    '''
+
+    firstStates = {}
+    curr, facing = grid.startPos, 0
+    while True:
+        offset = grid.DIRS4[facing]
+        nextPos = jumps[facing][curr]
+
+        # Every cell we pass through was entered from the one right behind it
+        for i in range(curr + offset, nextPos + offset, offset):
+            if i not in firstStates and i in grid:
+                firstStates[i] = (i - offset) * 4 + facing
+
+        if nextPos not in grid:
+            return firstStates
+        curr, facing = nextPos, (facing + 1) % 4
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def toSet(coord:Coord, direction:Direction) -> str:
-    ''' For adding unique coord/direction entries into our hashset '''
-    return str(coord) + '_' + str(direction)
+def jumpWithBlocker(i:int, facing:int, blocker:int, grid:Lab, jumps:List[array]) -> int:
+    ''' Same as jumps[facing][i], but as if there was also an obstacle at blocker '''
+
+    offset = grid.DIRS4[facing]
+    nextPos = jumps[facing][i]
+
+    # Stop short if the blocker is straight ahead of us, before where we'd stop anyway
+    steps, rem = divmod(blocker - i, offset)
+    if rem == 0 and 0 < steps <= (nextPos - i) // offset:
+        return blocker - offset
+
+    return nextPos
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def testIfLoop(blockerCoord:Coord, testDir:Direction, testGrid:Grid):
+def testIfLoop(blocker:int, state:int, grid:Lab, jumps:List[array], 
+               seen:bytearray) -> int:
+    '''
+    Starting from state, jump around with an extra obstacle at blocker until we
+    either leave the grid or stop at a spot we've already stopped at facing the
+    same way (a loop!). seen is a bitmap over packed states, and it's handed back
+    all zeros again so the next blocker can reuse it
+    '''
+
+    curr, facing = divmod(state, 4)
+    touched = []
+    out = 0
+    while True:
+
+        if profiling.ENABLED:
+            profiling.count('jump')
+
+        curr = jumpWithBlocker(curr, facing, blocker, grid, jumps)
+        if curr not in grid:
+            break
 
-    # We can't add a blocker to the start coordinate, so return immediately
-    if blockerCoord.r == testGrid.startPos.r and blockerCoord.c == testGrid.startPos.c:
-        return 0
+        # Only the spots where we turn can start a loop, so only track those
+        state = curr * 4 + facing
+        if seen[state]:
+            out = 1
+            break
+        seen[state] = 1
+        touched.append(state)
+        facing = (facing + 1) % 4
 
-    # Add in our new blocker "#"
-    origVal = testGrid.grid[blockerCoord.r][blockerCoord.c]
-    testGrid.updateInd(blockerCoord.r, blockerCoord.c, '#')
+    # Cheaper to undo just what we touched than to make a whole new bitmap
+    for state in touched:
+        seen[state] = 0
 
-    # Initialize things
-    visited = set()
-    testCoord = Coord(testGrid.startPos.r, testGrid.startPos.c)
+    return out
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def countLoops(grid:Lab, jumps:List[array], candidates:Iterable[Tuple[int, int]]) -> int:
+    ''' Number of (blocker, state before first reaching it) candidates that cause a loop '''
 
-    # Now iterate until either we're out of the grid or we've reached a loop
-    while testCoord in testGrid and toSet(testCoord, testDir) not in visited:
-        visited.add(toSet(testCoord, testDir))
-        testCoord = testDir.takeStep(testCoord, testGrid)
+    seen = bytearray(4 * len(grid.cells))
 
-    # Have to be sure to revert our grid back since we're passing by reference
-    testGrid.updateInd(blockerCoord.r, blockerCoord.c, origVal)
+    # We can't add a blocker to the start coordinate, so skip that one
+    out = 0
+    for blocker, state in candidates:
+        if blocker != grid.startPos:
+            out += testIfLoop(blocker, state, grid, jumps, seen)
 
-    # If we're still in the grid, then hoorah this blocker caused a loop!
-    return 1 if testCoord in testGrid else 0
+    return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
-    # Initialize things
-    out = 0
-    grid = Grid(inputs)
-    currDir = Direction()
-    actualVisited = set()
-    curr = getStart(grid)
-
-    # Basically redo part 1 so we have a hashset of all our visited coords
-    while curr in grid:
-        actualVisited.add(str(curr))
-        curr = currDir.takeStep(curr, grid)
+    # Basically redo part 1 so we know all our visited indices
+    grid = Lab(inputs)
+    jumps = getJumpTable(grid)
+    firstStates = getFirstStates(grid, jumps)
 
-    # Now for each of those visited coords, try putting a blocker and see if
+    # Now for each of those visited indices, try putting a blocker and see if
     # that causes us to be in an infinite loop
-    for curr in actualVisited:
-        blockerCoord = Coord(*[int(x) for x in curr.split('_')])
-        out += testIfLoop(blockerCoord, Direction(), grid)
-
-    return out
+    return countLoops(grid, jumps, firstStates.items())
     
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, walking the guard's original path only once '''
+
+    grid = Lab(inputs)
+    jumps = getJumpTable(grid)
+    firstStates = getFirstStates(grid, jumps)
+
+    # Every cell we visit but the start gets entered at some point (maybe the
+    # start too, if we walk back over it)
+    part1 = len(firstStates) + (grid.startPos not in firstStates)
+
+    return part1, countLoops(grid, jumps, firstStates.items())
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+_shared = None
+def initWorker(grid:Lab, jumps:List[array]):
+    ''' 
+    Each worker process gets the grid and jump table once, up front. Nothing
+    ever writes to them, so with fork these stay shared copy-on-write pages
+    '''
+    global _shared
+    _shared = grid, jumps
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def countLoopsShard(candidates:List[Tuple[int, int]]) -> int:
+    ''' Worker job: count the loops in one shard of our candidate blockers '''
+    grid, jumps = _shared
+    return countLoops(grid, jumps, candidates)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_parallel(inputs, workers:int) -> Tuple[int, int]:
+    ''' 
+    Solve both parts, spreading the candidate blockers for part 2 across worker
+    processes. Each candidate gets checked on its own, so we just add up each
+    shard's partial count
+    '''
+
+    grid = Lab(inputs)
+    jumps = getJumpTable(grid)
+    firstStates = getFirstStates(grid, jumps)
+    part1 = len(firstStates) + (grid.startPos not in firstStates)
+
+    # Deal the candidates out round robin, so no one shard gets stuck with every
+    # slow blocker from one stretch of the path
+    candidates = list(firstStates.items())
+    shards = [candidates[k::workers] for k in range(workers)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initWorker,
+                             initargs=(grid, jumps)) as pool:
+        part2 = sum(pool.map(countLoopsShard, shards))
+
+    return part1, part2
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file and a number of workers, check its blockers in parallel instead
+    if len(sys.argv) > 2:
+        workers = int(sys.argv[2]) or os.cpu_count()
+        for answer in solve_parallel(read_input(sys.argv[1]), workers):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day06', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day06')
 
     return
 
@@ -4,74 +4,178 @@
 '''
 
 from pathlib import Path
-from typing import List
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import os
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.loader import read_input, streamLines
+
+# NumPy is optional, without it solve_ops just keeps its values in a set
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def parseLine(line:str) -> tuple[int, List[int]]:
     ''' Helper for getting our inputs into the form we need'''
     left, right = line.split(': ')
     return int(left), [int(x) for x in right.split(' ')]
-    
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def recurse(testVal:int, nums:List[int]) -> bool:
-    ''' Recursive logic for testing all combinations of "+" and "*" '''
+def getShift(num:int) -> int:
+    ''' 
+    Power of ten one digit longer than num, so that "a || num" is just
+    a * getShift(num) + num, no strings needed
+    '''
 
-    # Base case: we're left with one number in nums, see if it's equal to testVal
-    if len(nums) == 1:
-        return testVal == nums[0]
+    shift = 10
+    while shift <= num:
+        shift *= 10
+
+    return shift
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def getShifts(nums:List[int]) -> List[int]:
+    ''' getShift for each of our numbers, computed once up front '''
+    return [getShift(num) for num in nums]
     
-    # Prune off any cases that are already larger than testVal
-    if nums[0] > testVal:
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def recurse(testVal:int, nums:List[int], i:int, shifts:Optional[List[int]], 
+            seen:Set[Tuple[int, int]]) -> bool:
+    ''' 
+    Can we make testVal out of nums[0..i] with "+" and "*" (and "||" if we were
+    given shifts)? Works backwards from the right end, undoing whichever
+    operation made the last number: subtract it, divide it out, or strip it off
+    as a decimal suffix. If an undo isn't possible (negative, doesn't divide
+    evenly, wrong suffix), that whole branch is pruned before we ever go down it.
+    Every (i, testVal) state that didn't work out goes in seen, so different
+    routes to the same state only get explored once
+    '''
+
+    if profiling.ENABLED:
+        profiling.count('recurse' if shifts is None else 'recurse2')
+
+    # Base case: we're down to the first number, see if it's what's left over
+    last = nums[i]
+    if i == 0:
+        return testVal == last
+    if (i, testVal) in seen:
         return False
+    seen.add((i, testVal))
+
+    # Undo "+"
+    if testVal >= last and recurse(testVal - last, nums, i-1, shifts, seen):
+        return True
 
-    # Recursive case: try "+" and "*"
-    case1 = recurse(testVal, [nums[0] + nums[1]] + nums[2:])
-    case2 = recurse(testVal, [nums[0] * nums[1]] + nums[2:])
+    # Undo "*"
+    if last == 0:
+        if testVal == 0:
+            return True
+    elif testVal % last == 0 and recurse(testVal // last, nums, i-1, shifts, seen):
+        return True
 
-    # Return true if any combination is true
-    return case1 or case2 
+    # Undo "||", testVal has to end in the digits of last
+    if shifts is not None:
+        if testVal >= last and (testVal - last) % shifts[i] == 0:
+            return recurse((testVal - last) // shifts[i], nums, i-1, shifts, seen)
+
+    return False
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def task_1(inputs):
-    ''' Solve part 1 '''
+def canMake(testVal:int, nums:List[int], shifts:Optional[List[int]]=None) -> bool:
+    ''' Can we make testVal out of all of nums (with "||" too if we're given shifts) '''
+    return recurse(testVal, nums, len(nums)-1, shifts, set())
 
-    # For each line in our file, recursively check all combinations of operations
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+class Operator():
+    '''
+    One operator we can put between two numbers. apply(a, b) has to work with a
+    as a plain int or a whole NumPy array of ints. If it can ever make a value
+    smaller (e.g., "-"), grows is False and we can't prune on testVal anymore
+    '''
+    def __init__(self, apply:Callable, grows:bool=True):
+        self.apply = apply
+        self.grows = grows
+
+# Every operator we know about. As long as our numbers are all positive, "+",
+# "*", and "||" can only ever grow a value (canMakeWith handles any zeros)
+OPERATORS = {
+    '+': Operator(lambda a, b: a + b),
+    '*': Operator(lambda a, b: a * b),
+    '||': Operator(lambda a, b: a * getShift(b) + b),
+    '-': Operator(lambda a, b: a - b, grows=False),
+}
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def canMakeWith(testVal:int, nums:List[int], ops:Sequence[Operator]) -> bool:
+    '''
+    Can we make testVal out of nums using any of ops? Goes breadth first: after
+    each number we have every distinct value reachable so far, as one NumPy
+    array (or a set without NumPy), and anything past testVal gets pruned
+    '''
+
+    # A zero can shrink a value back down (e.g., "*" by 0), so no pruning then
+    prune = all(op.grows for op in ops) and 0 not in nums
+
+    if np is None:
+        vals = {nums[0]}
+        for b in nums[1:]:
+            vals = {op.apply(a, b) for op in ops for a in vals}
+            if prune:
+                vals = {a for a in vals if a <= testVal}
+        return testVal in vals
+
+    # With pruning every value stays <= testVal (or is our unpruned first
+    # number), so if one more operator can't push that past int64 we can stay
+    # in int64. Otherwise use Python ints
+    biggest = max(max(nums), getShift(max(nums)))
+    fits = prune and (max(testVal, nums[0]) + 1) * (biggest + 1) < 2**63
+    vals = np.array([nums[0]], dtype=np.int64 if fits else object)
+    for b in nums[1:]:
+        vals = np.unique(np.concatenate([op.apply(vals, b) for op in ops]))
+        if prune:
+            vals = vals[vals <= testVal]
+        if len(vals) == 0:
+            return False
+
+    return bool((vals == testVal).any())
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_ops(inputs, symbols:Sequence[str]) -> int:
+    ''' Total calibration result using any set of operators from OPERATORS '''
+
+    ops = [OPERATORS[symbol] for symbol in symbols]
     out = 0
     for input in inputs:
+        if not input:
+            continue
         testVal, nums = parseLine(input)
-        if recurse(testVal, nums):
+        if canMakeWith(testVal, nums, ops):
             out += testVal
 
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def recurse2(testVal:int, nums:List[int]) -> bool:
-    ''' Recursive logic for testing all combinations of "+", "*", and "||" '''
-
-    # Base case: we're left with one number in nums, see if it's equal to testVal
-    if len(nums) == 1:
-        return testVal == nums[0]
-    
-    # Prune off any cases that are already larger than testVal
-    if nums[0] > testVal:
-        return False
+@profiling.timed('part1')
+def task_1(inputs):
+    ''' Solve part 1 '''
 
-    # Recursive case: try "+" and "*" and "||"
-    case1 = recurse2(testVal, [nums[0] + nums[1]] + nums[2:])
-    case2 = recurse2(testVal, [nums[0] * nums[1]] + nums[2:])
-    case3 = recurse2(testVal, [int( str(nums[0]) + str(nums[1]) )] + nums[2:])
+    # For each line in our file, recursively check all combinations of operations
+    out = 0
+    for input in inputs:
+        testVal, nums = parseLine(input)
+        if canMake(testVal, nums):
+            out += testVal
 
-    # Return true if any combination is true
-    return case1 or case2 or case3
+    return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
@@ -79,21 +183,93 @@ def task_2(inputs):
     out = 0
     for input in inputs:
         testVal, nums = parseLine(input)
-        if recurse2(testVal, nums):
+        if canMake(testVal, nums, getShifts(nums)):
             out += testVal
 
     return out
     
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_stream(lines:Iterable[str]) -> Tuple[int, int]:
+    ''' Solve both parts in a single pass, one equation in memory at a time '''
+
+    part1, part2 = 0, 0
+    for input in lines:
+        if not input:
+            continue
+        testVal, nums = parseLine(input)
+
+        # Anything solvable with "+" and "*" is also solvable once we add "||"
+        if canMake(testVal, nums):
+            part1 += testVal
+            part2 += testVal
+        elif canMake(testVal, nums, getShifts(nums)):
+            part2 += testVal
+
+    return part1, part2
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def iterBatches(lines:Iterable[str], size:int) -> Iterator[List[str]]:
+    ''' Group our lines up into lists of (up to) size lines each '''
+    lines = iter(lines)
+    while batch := list(islice(lines, size)):
+        yield batch
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_parallel(lines:Iterable[str], workers:int, size:int=10000) -> Tuple[int, int]:
+    ''' 
+    Solve both parts with batches of equations spread across worker processes.
+    Every equation is independent, so each batch is just solve_stream, and we
+    add up the partial sums as they come back. Only about two batches per
+    worker are ever in flight, so we never read much further ahead than that
+    '''
+
+    part1, part2 = 0, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for batch in iterBatches(lines, size):
+            # Wait for some room before reading (and submitting) any more
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    p1, p2 = future.result()
+                    part1 += p1
+                    part2 += p2
+            pending.add(pool.submit(solve_stream, batch))
+
+        for future in pending:
+            p1, p2 = future.result()
+            part1 += p1
+            part2 += p2
+
+    return part1, part2
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts together, parsing each equation only once '''
+    return solve_stream(inputs)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file (or "-" for stdin), stream it through in a single pass instead.
+    # Given a number of workers too, spread batches of it across them
+    if len(sys.argv) > 2:
+        workers = int(sys.argv[2]) or os.cpu_count()
+        for answer in solve_parallel(streamLines(sys.argv[1]), workers):
+            print(answer)
+        return
+    if len(sys.argv) > 1:
+        for answer in solve_stream(streamLines(sys.argv[1])):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day07', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day07')
 
     return
 
@@ -4,81 +4,123 @@
 '''
 
 from pathlib import Path
+from array import array
+from typing import Dict, Iterator, List, Tuple
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.grid import SENTINEL, Grid
+from utils.loader import readGrid as read_input
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Coord():
-    ''' Helper class for giving us a coordinate on our grid '''
-    def __init__(self, r, c):
-        self.r = r
-        self.c = c
-
-    def __str__(self):
-        return f'{self.r}_{self.c}'
-    
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Grid():
-    ''' Helper class for storing properties of our grid '''
+# NumPy is optional, without it we just loop over each pair of antennas
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-    def __init__(self, grid):
-        self.grid = grid
-        self.M = len(grid)
-        self.N = len(grid[0])
+# Cell value for a spot with no antenna
+EMPTY = ord('.')
 
-    def __contains__(self, coord:Coord) -> bool:
-        ''' So that we can do things like: if coord in grid '''
-        return 0 <= coord.r < self.M and 0 <= coord.c < self.N
-    
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def parseInputs(grid:Grid):
-    ''' Get a hashmap mapping a letter to a list of coordinates of that letter '''
+@profiling.timed('parse')
+def parseInputs(grid:Grid) -> Dict[int, List[Tuple[int, int]]]:
+    ''' Get a hashmap mapping a letter to a list of (row, col) coordinates of that letter '''
 
     hashmap = {}
-    for r in range(grid.M):
-        for c in range(grid.N):
-            if grid.grid[r][c] == '.':
-                continue
-            elif grid.grid[r][c] in hashmap:
-                hashmap[grid.grid[r][c]].append(Coord(r,c))
-            else:
-                hashmap[grid.grid[r][c]] = [Coord(r,c)]
-
-    # hashmap = map[str, List[Coord]]
+    for i in grid.indices():
+        if grid.cells[i] == EMPTY:
+            continue
+        elif grid.cells[i] in hashmap:
+            hashmap[grid.cells[i]].append(grid.coord(i))
+        else:
+            hashmap[grid.cells[i]] = [grid.coord(i)]
+
     return hashmap
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def findAntinodes(coord1:Coord, coord2:Coord, grid:Grid, antinodeLocs:set):
-    ''' Given two specific coordinates of same letter, find their antinodes '''
+def iterAntinodes(coord1:Tuple[int, int], coord2:Tuple[int, int], grid:Grid) -> Iterator[int]:
+    ''' Given two specific coordinates of same letter, yield the cell index of each antinode '''
 
     # Relative offset between coordinates
-    dr, dc = coord2.r-coord1.r, coord2.c-coord1.c
+    (r1, c1), (r2, c2) = coord1, coord2
+    dr, dc = r2-r1, c2-c1
+
+    # If possible antinode coordinate is in grid, that's one
+    if grid.inBounds(r1-dr, c1-dc):
+        yield grid.index(r1-dr, c1-dc)
 
-    # Possible antinode locations
-    possibleAntinode1 = Coord(coord1.r-dr, coord1.c-dc)
-    possibleAntinode2 = Coord(coord2.r+dr, coord2.c+dc)
+    # If possible antinode coordinate is in grid, that's one
+    if grid.inBounds(r2+dr, c2+dc):
+        yield grid.index(r2+dr, c2+dc)
 
-    # If possible antinode coordinate is in grid, add it to our output set
-    if possibleAntinode1 in grid:
-        antinodeLocs.add(str(possibleAntinode1))
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def findAntinodes(coord1:Tuple[int, int], coord2:Tuple[int, int], grid:Grid, antinodeLocs:set):
+    ''' Given two specific coordinates of same letter, find their antinodes '''
+    antinodeLocs.update(iterAntinodes(coord1, coord2, grid))
 
-    # If possible antinode coordinate is in grid, add it to our output set
-    if possibleAntinode2 in grid:
-        antinodeLocs.add(str(possibleAntinode2))
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def markInBounds(points:'np.ndarray', bitmap:'np.ndarray') -> 'np.ndarray':
+    ''' Mark every (row, col) point that's inside our bitmap, returning which ones were '''
+    M, N = bitmap.shape
+    inBounds = ((points >= 0) & (points < (M, N))).all(axis=1)
+    bitmap[points[inBounds, 0], points[inBounds, 1]] = True
+    return inBounds
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def markAntinodesNumpy(coords:'np.ndarray', bitmap:'np.ndarray', bitmap2:'np.ndarray'):
+    '''
+    Same as findAntinodes and findAntinodes2, but for every pair of one letter's
+    (row, col) coordinates at once. Part 1 antinodes go in bitmap, part 2's go in
+    bitmap2 (both M x N booleans, so duplicates just mark the same cell twice)
+    '''
+
+    # Every pair i < j, and the offset from the first to the second
+    first, second = np.triu_indices(len(coords), k=1)
+    start1, start2 = coords[first], coords[second]
+    offset = start2 - start1
+
+    # Part 1: one step out past each end
+    markInBounds(start1 - offset, bitmap)
+    markInBounds(start2 + offset, bitmap)
+
+    # Part 2: keep stepping out from both ends, dropping each line of harmonics
+    # once it leaves the grid
+    for points, step in ((start1, -offset), (start2, offset)):
+        while len(points):
+            inBounds = markInBounds(points, bitmap2)
+            points, step = points[inBounds] + step[inBounds], step[inBounds]
 
     return
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_numpy(grid:Grid) -> Tuple[int, int]:
+    ''' Both parts' antinode counts, one letter's pairs at a time as NumPy arrays '''
+
+    hashmap = parseInputs(grid)
+    bitmap = np.zeros((grid.M, grid.N), dtype=bool)
+    bitmap2 = np.zeros((grid.M, grid.N), dtype=bool)
+
+    # For each unique letter
+    for letterCoords in hashmap.values():
+
+        # Don't do anything if there's only one instance of this letter
+        if len(letterCoords) < 2:
+            continue
+
+        markAntinodesNumpy(np.array(letterCoords), bitmap, bitmap2)
+
+    return int(bitmap.sum()), int(bitmap2.sum())
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
     # Initialize things
     grid = Grid(inputs)
+    if np is not None:
+        return solve_numpy(grid)[0]
     hashmap = parseInputs(grid)
     antinodeLocs = set()
 
@@ -87,7 +129,7 @@ def task_1(inputs):
 
         # Don't do anything if there's only one instance of this letter
         if len(letterCoords) < 2:
-            break
+            continue
 
         # For every combo of letterCoords for a given letter
         for i in range(len(letterCoords)-1):
@@ -98,29 +140,115 @@ def task_1(inputs):
     return len(antinodeLocs)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def findAntinodes2(coord1:Coord, coord2:Coord, grid:Grid, antinodeLocs:set):
+def iterAntinodes2(coord1:Tuple[int, int], coord2:Tuple[int, int], grid:Grid) -> Iterator[int]:
+    ''' Same as iterAntinodes, but with part 2's rules (the whole line of harmonics) '''
 
     # Relative offset between coordinates
-    dr, dc = coord2.r-coord1.r, coord2.c-coord1.c
+    (r1, c1), (r2, c2) = coord1, coord2
+    dr, dc = r2-r1, c2-c1
 
     # Possible antinode coordinate in one direction
-    while coord1 in grid:
-        antinodeLocs.add(str(coord1))
-        coord1 = Coord(coord1.r-dr, coord1.c-dc)
+    while grid.inBounds(r1, c1):
+        yield grid.index(r1, c1)
+        r1, c1 = r1-dr, c1-dc
 
     # Possible antinode coordinate in the other direction
-    while coord2 in grid:
-        antinodeLocs.add(str(coord2))
-        coord2 = Coord(coord2.r+dr, coord2.c+dc)
+    while grid.inBounds(r2, c2):
+        yield grid.index(r2, c2)
+        r2, c2 = r2+dr, c2+dc
 
-    return
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def findAntinodes2(coord1:Tuple[int, int], coord2:Tuple[int, int], grid:Grid, antinodeLocs:set):
+    antinodeLocs.update(iterAntinodes2(coord1, coord2, grid))
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+class AntinodeIndex():
+    '''
+    Keeps both parts' antinode counts up to date while antennas get added and
+    removed one at a time. Each cell holds a reference count of how many
+    antenna pairs put an antinode there, so adding or removing an antenna only
+    touches the pairs that antenna is part of, and a cell only stops being an
+    antinode once its count drops back to zero.
+
+    The index takes ownership of the grid it's given: grid.cells gets kept in
+    sync with add() and remove(), so don't share that grid with anything else
+    '''
+
+    def __init__(self, grid:Grid):
+        self.grid = grid
+        self.antennas = {}
+        self.refs = array('i', bytes(4 * len(grid.cells)))
+        self.refs2 = array('i', bytes(4 * len(grid.cells)))
+        self.count = 0
+        self.count2 = 0
+
+        # Start off with whatever antennas are already on the grid
+        cells = grid.cells
+        for i in grid.indices():
+            if cells[i] != EMPTY:
+                cells[i], letter = EMPTY, cells[i]
+                self.add(letter, *grid.coord(i))
+
+    def update(self, coord:Tuple[int, int], others, delta:int):
+        ''' Add delta to the reference counts of every antinode coord makes with others '''
+
+        for other in others:
+            for i in iterAntinodes(coord, other, self.grid):
+                self.refs[i] += delta
+                if self.refs[i] == (1 if delta > 0 else 0):
+                    self.count += delta
+            for i in iterAntinodes2(coord, other, self.grid):
+                self.refs2[i] += delta
+                if self.refs2[i] == (1 if delta > 0 else 0):
+                    self.count2 += delta
+
+        return
+
+    def add(self, letter:int, r:int, c:int):
+        ''' Put an antenna of frequency letter (as a byte) at (r, c) '''
+
+        if not self.grid.inBounds(r, c):
+            raise ValueError(f'{(r, c)} is outside of our grid')
+
+        # An empty cell or the grid's padding can't be a frequency, and anything
+        # else has to fit in one of our bytes
+        if letter in (EMPTY, SENTINEL) or not 0 <= letter < 256:
+            raise ValueError(f'{letter!r} is not an antenna frequency')
+
+        i = self.grid.index(r, c)
+        if self.grid.cells[i] != EMPTY:
+            raise ValueError(f'There is already an antenna at {(r, c)}')
+
+        others = self.antennas.setdefault(letter, set())
+        self.update((r, c), others, +1)
+        others.add((r, c))
+        self.grid.cells[i] = letter
+
+    def remove(self, r:int, c:int):
+        ''' Take away whatever antenna is at (r, c) '''
+
+        if not self.grid.inBounds(r, c):
+            raise ValueError(f'{(r, c)} is outside of our grid')
+
+        i = self.grid.index(r, c)
+        letter = self.grid.cells[i]
+        if letter == EMPTY:
+            raise ValueError(f'There is no antenna at {(r, c)}')
+
+        others = self.antennas[letter]
+        others.discard((r, c))
+        self.update((r, c), others, -1)
+        self.grid.cells[i] = EMPTY
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
     # Initialize things
     grid = Grid(inputs)
+    if np is not None:
+        return solve_numpy(grid)[1]
     hashmap = parseInputs(grid)
     antinodeLocs = set()
 
@@ -129,7 +257,7 @@ def task_2(inputs):
 
         # Don't do anything if there's only one instance of this letter
         if len(letterCoords) < 2:
-            break
+            continue
 
         # For every combo of letterCoords for a given letter
         for i in range(len(letterCoords)-1):
@@ -139,16 +267,42 @@ def task_2(inputs):
     # Output is just the number of unique antinode locations
     return len(antinodeLocs)
     
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, finding antennas and looping over each pair only once '''
+
+    # Initialize things
+    grid = Grid(inputs)
+    if np is not None:
+        return solve_numpy(grid)
+    hashmap = parseInputs(grid)
+    antinodeLocs, antinodeLocs2 = set(), set()
+
+    # For each unique letter
+    for letterCoords in hashmap.values():
+
+        # Don't do anything if there's only one instance of this letter
+        if len(letterCoords) < 2:
+            continue
+
+        # For every combo of letterCoords for a given letter, do both parts' antinodes
+        for i in range(len(letterCoords)-1):
+            for j in range(i+1, len(letterCoords)):
+                findAntinodes(letterCoords[i], letterCoords[j], grid, antinodeLocs)
+                findAntinodes2(letterCoords[i], letterCoords[j], grid, antinodeLocs2)
+
+    return len(antinodeLocs), len(antinodeLocs2)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
     infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_1(inputs))
-
-    inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day08', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day08')
 
     return
 
@@ -0,0 +1,107 @@
+'''
+    What: Advent of Code 2024 - Day 08 AntinodeIndex check
+    Who: Josh Geiser
+
+    Usage: python Day08/check_index.py [--trials N] [--edits N] [--seed N]
+
+    Makes random antenna maps, then adds and removes random antennas one at a
+    time, checking after every edit that AntinodeIndex's counts match a full
+    recompute over every pair of antennas
+'''
+
+from pathlib import Path
+from typing import List, Tuple
+import argparse
+import random
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from Day08 import EMPTY, AntinodeIndex, iterAntinodes, iterAntinodes2, parseInputs
+from utils.grid import SENTINEL, Grid
+
+LETTERS = 'aAb0'
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def recompute(rows:List[str]) -> Tuple[int, int]:
+    ''' Both parts' antinode counts from scratch, over every pair of every frequency '''
+
+    grid = Grid(rows)
+    antinodeLocs, antinodeLocs2 = set(), set()
+    for letterCoords in parseInputs(grid).values():
+        for i in range(len(letterCoords)-1):
+            for j in range(i+1, len(letterCoords)):
+                antinodeLocs.update(iterAntinodes(letterCoords[i], letterCoords[j], grid))
+                antinodeLocs2.update(iterAntinodes2(letterCoords[i], letterCoords[j], grid))
+
+    return len(antinodeLocs), len(antinodeLocs2)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def checkTrial(rng:random.Random, numEdits:int):
+    ''' One random map, then numEdits random adds/removes, checking after each '''
+
+    M, N = rng.randint(1, 12), rng.randint(1, 12)
+    rows = [[rng.choice('.....' + LETTERS) for _ in range(N)] for _ in range(M)]
+    index = AntinodeIndex(Grid([''.join(row) for row in rows]))
+
+    for edit in range(numEdits + 1):
+        expected = recompute([''.join(row) for row in rows])
+        if (index.count, index.count2) != expected:
+            raise SystemExit(f'Mismatch after {edit} edits on {rows}: '
+                             f'{(index.count, index.count2)} != {expected}')
+
+        # Either put a new antenna on an empty spot, or take one away
+        r, c = rng.randrange(M), rng.randrange(N)
+        if rows[r][c] == '.':
+            rows[r][c] = rng.choice(LETTERS)
+            index.add(ord(rows[r][c]), r, c)
+        else:
+            rows[r][c] = '.'
+            index.remove(r, c)
+
+    # Spots outside the grid should be refused, not wrapped onto another row
+    for r, c in ((0, N), (M, 0), (-1, 0), (0, -1)):
+        try:
+            index.add(ord(LETTERS[0]), r, c)
+        except ValueError:
+            continue
+        raise SystemExit(f'add() accepted out of bounds {(r, c)} on a {M}x{N} grid')
+
+    # So should frequencies that are really empty cells or padding
+    counts = (index.count, index.count2)
+    for letter in (EMPTY, SENTINEL, 256):
+        r, c = rng.randrange(M), rng.randrange(N)
+        if rows[r][c] != '.':
+            index.remove(r, c)
+            rows[r][c] = '.'
+            counts = recompute([''.join(row) for row in rows])
+        try:
+            index.add(letter, r, c)
+        except ValueError:
+            if (index.count, index.count2) != counts or index.grid.cells[index.grid.index(r, c)] != EMPTY:
+                raise SystemExit(f'add() refused frequency {letter} but still changed the index')
+            continue
+        raise SystemExit(f'add() accepted frequency {letter} at {(r, c)}')
+
+    return
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def main():
+
+    parser = argparse.ArgumentParser(description='Check AntinodeIndex against full recomputes')
+    parser.add_argument('--trials', type=int, default=300, help='number of random maps')
+    parser.add_argument('--edits', type=int, default=30, help='random edits per map')
+    parser.add_argument('--seed', type=int, default=8, help='random seed')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for _ in range(args.trials):
+        checkTrial(rng, args.edits)
+
+    print(f'OK: {args.trials} maps x {args.edits} edits')
+
+    return
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+if __name__ == '__main__':
+    main()
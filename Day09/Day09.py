@@ -5,30 +5,34 @@
 
 from pathlib import Path
 from collections import deque
-from typing import List
+from typing import List, Tuple
+import heapq
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.loader import read_input
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def ind2id(ind):
     return int(ind / 2) if ind % 2 == 0 else -1
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def task_1(inputs):
-    ''' Solve part 1 '''
+@profiling.timed('parse')
+def parseInputs(inputs) -> List[int]:
+    ''' Our disk map as a list of ints (alternating file size, free space size) '''
+    return [int(ch) for ch in inputs[0]]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def compactBlocks(sizes:List[int]) -> int:
+    ''' Part 1: move file blocks one at a time into the leftmost free space, return checksum '''
 
     # Initialization
-    inputs = inputs[0]
     IDs = deque()
 
     # First let's make a stack of all the IDs (with # of occurences)
-    for i in range(0, len(inputs), 2):
-        for numTimes in range(int(inputs[i])):
+    for i in range(0, len(sizes), 2):
+        for numTimes in range(sizes[i]):
             IDs.append(ind2id(i))
 
     # Initialize other things
@@ -37,11 +41,11 @@ def task_1(inputs):
     out = 0
 
     # For each index in our input string
-    for i in range(len(inputs)):
+    for i in range(len(sizes)):
 
         # If we're on a file space...
         if i % 2 == 0:
-            for numTimes in range(int(inputs[i])):
+            for numTimes in range(sizes[i]):
 
                 # ID number is simply based on the index we're at
                 out += position * ind2id(i)
@@ -53,7 +57,7 @@ def task_1(inputs):
                 
         # If we're on a free space
         else:
-            for numTimes in range(int(inputs[i])):
+            for numTimes in range(sizes[i]):
 
                 # Pop from our stack
                 out += position * IDs.pop()
@@ -65,6 +69,12 @@ def task_1(inputs):
 
     raise SystemError()
 
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
+def task_1(inputs):
+    ''' Solve part 1 '''
+    return compactBlocks(parseInputs(inputs))
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 class File():
     ''' Class representing a file object that fills space and has an id value '''
@@ -74,101 +84,116 @@ class File():
         self.size = size
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Empty():
-    ''' Class representing a block of currently empty space '''
-    def __init__(self, blockStart, size):
-        self.blockStart = blockStart
-        self.size = size
+def getEmptyHeaps(sizes:List[int], ind2block:dict) -> List[List[int]]:
+    '''
+    Our empty spans, split up by size: heaps[size] is a min-heap of the starting
+    blocks of every empty span exactly that long. Spans only ever come from a
+    single digit and only ever shrink, so sizes 1-9 cover everything
+    '''
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def findMove(file:File, empties:List[Empty]) -> int:
-    ''' For a given file, figure out where (if anywhere) we can move it'''
+    heaps = [[] for _ in range(10)]
+    for i in range(1, len(sizes), 2):
+        if sizes[i] != 0:
+            heaps[sizes[i]].append(ind2block[i])
+
+    # Blocks were added left to right, so these are already valid heaps
+    return heaps
 
-    # Only need to check for "empty" values to the left of where we currently are
-    emptiesInd = 0
-    while emptiesInd < len(empties) and empties[emptiesInd].blockStart < file.blockStart:
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def findMove(file:File, heaps:List[List[int]]) -> int:
+    ''' 
+    For a given file, figure out where (if anywhere) we can move it. The leftmost
+    span that fits is just the smallest heap top out of every size big enough,
+    so this returns the size of the span to use (or -1 if we can't move left)
+    '''
 
-        # If we've found a viable empty position, return the index in empties array
-        if empties[emptiesInd].size >= file.size:
-            return emptiesInd
+    best, bestStart = -1, file.blockStart
+    for size in range(file.size, len(heaps)):
+        if heaps[size] and heaps[size][0] < bestStart:
+            best, bestStart = size, heaps[size][0]
 
-        emptiesInd += 1
+    # How many heaps we had to look at to get here
+    if profiling.ENABLED:
+        profiling.count('findMove')
+        profiling.count('findMove.scanned', len(heaps) - file.size)
 
-    # If the file cannot be moved leftward, return -1
-    return -1
+    return best
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def doMove(file:File, empties:List[Empty], emptiesInd:int):
+def doMove(file:File, heaps:List[List[int]], size:int):
     ''' For a given file to be moved leftward, actually perform the move '''
 
     # Block index we're actually moving our file to
-    moveIndex = empties[emptiesInd].blockStart
+    file.blockStart = heapq.heappop(heaps[size])
 
-    # Update our current file location
-    file.blockStart = moveIndex
-
-    # Now update this "empty" instance since we've placed a block there
-    if empties[emptiesInd].size == file.size:
-        del empties[emptiesInd]
-    else:
-        empties[emptiesInd].size -= file.size
-        empties[emptiesInd].blockStart += file.size
+    # Whatever part of that span we didn't fill is now a smaller empty span
+    if size > file.size:
+        heapq.heappush(heaps[size - file.size], file.blockStart + file.size)
 
     return
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def getCheckSum(file:File) -> int:
-    ''' Return the checksum value for a single file '''
-    return sum([file.id * elem for elem in range(file.blockStart, file.blockStart+file.size)])
+    ''' 
+    Return the checksum value for a single file. That's id times the sum of its
+    block positions, which is just an arithmetic series
+    '''
+    return file.id * file.size * (2 * file.blockStart + file.size - 1) // 2
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def task_2(inputs):
-    ''' Solve part 2 '''
-
-    # Initialization
-    inputs = inputs[0]
+def compactFiles(sizes:List[int]) -> int:
+    ''' Part 2: move whole files into the leftmost free span that fits, return checksum '''
 
     # Get a hashmap of string index -> starting block position
     ind2block = {0: 0}
-    for i in range(1, len(inputs)):
-        ind2block[i] = ind2block[i-1] + int(inputs[i-1])
+    for i in range(1, len(sizes)):
+        ind2block[i] = ind2block[i-1] + sizes[i-1]
 
     # First, let's make a list of all the files
     filesList = []
-    for i in range(len(inputs)-1, -1, -2):
-        if int(inputs[i]) != 0:
-            filesList.append(File(ind2id(i), ind2block[i], int(inputs[i])))
+    for i in range(len(sizes)-1, -1, -2):
+        if sizes[i] != 0:
+            filesList.append(File(ind2id(i), ind2block[i], sizes[i]))
 
-    # Now, let's make a list of all of our empty blocks
-    empties = []
-    for i in range(1, len(inputs), 2):
-        if int(inputs[i]) != 0:
-            empties.append(Empty(ind2block[i], int(inputs[i])))
+    # Now, let's bucket all of our empty blocks by size
+    heaps = getEmptyHeaps(sizes, ind2block)
 
     # Now iterate through each file, attempting to move it leftward and updating checksum
     out = 0
     for file in filesList:
 
         # If we can move our file leftward, do it
-        emptiesInd = findMove(file, empties)
-        if emptiesInd != -1:
-            doMove(file, empties, emptiesInd)
+        size = findMove(file, heaps)
+        if size != -1:
+            doMove(file, heaps, size)
 
         # Regardless if moved or not, add the file's checksum to our total
         out += getCheckSum(file)
 
     return out
-    
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
+def task_2(inputs):
+    ''' Solve part 2 '''
+    return compactFiles(parseInputs(inputs))
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, parsing our disk map only once '''
+    sizes = parseInputs(inputs)
+    return compactBlocks(sizes), compactFiles(sizes)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
     infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_1(inputs))
-
-    inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day09', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day09')
 
     return
 
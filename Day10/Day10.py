@@ -4,84 +4,60 @@
 '''
 
 from pathlib import Path
+from typing import Dict, List, Tuple
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.grid import Grid
+from utils.loader import readGrid as read_input
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Coord():
-    ''' Helper class for giving us a coordinate on our grid '''
-    def __init__(self, r, c):
-        self.r = r
-        self.c = c
-
-    def __str__(self):
-        return f'{self.r}_{self.c}'
-    
-    def toTuple(self):
-        return (self.r, self.c)
-    
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Grid():
-    ''' Helper class for storing properties of our grid '''
+# Cell values for the bottom and top of a trail
+ZERO = ord('0')
+NINE = ord('9')
 
-    def __init__(self, grid):
-        self.grid = grid
-        self.M = len(grid)
-        self.N = len(grid[0])
+# Bump this whenever parsing changes, so stale cache entries get ignored
+CACHE_VERSION = 1
 
-    def __contains__(self, coord:Coord) -> bool:
-        ''' So that we can do things like: if coord in grid '''
-        return 0 <= coord.r < self.M and 0 <= coord.c < self.N
-    
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getNeighs(coord:Coord, grid:Grid):
-    ''' Get the neighbors for a given coordinate '''
-
-    # Look in each of 4 potential directions
-    DIRS = [(+1, +0), (-1, +0), (+0, -1), (+0, +1)]
-    out = []
-    for dr, dc in DIRS:
-        neigh = Coord(coord.r+dr, coord.c+dc)
+def getNeighs(i:int, grid:Grid) -> List[int]:
+    ''' Get the neighbors for a given cell index '''
 
-        # Each valid neighbor should be in grid and have a value of 1 greater than current
-        if (neigh in grid and
-            int(grid.grid[coord.r][coord.c]) + 1 == int(grid.grid[neigh.r][neigh.c])):
-            out.append(neigh)
-
-    return out
+    # Look in each of 4 potential directions. Each valid neighbor should have a 
+    # value of 1 greater than current (a SENTINEL off the edge never will)
+    return [i + d for d in grid.DIRS4 if grid.cells[i] + 1 == grid.cells[i + d]]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getNeighsMap(grid:Grid):
-    ''' Get a hashmap of each coordinate's neighbors: (r,c) -> List[Coord] '''
+@profiling.timed('parse')
+def getNeighsMap(grid:Grid) -> Dict[int, List[int]]:
+    ''' Get a hashmap of each cell index's neighbors: i -> List[int] (cached if it's on) '''
 
-    neighs = {}
-    for r in range(grid.M):
-        for c in range(grid.N):
-            neighs[(r,c)] = getNeighs(Coord(r,c), grid)
+    def build():
+        neighs = {}
+        for i in grid.indices():
+            neighs[i] = getNeighs(i, grid)
+        return neighs
 
-    return neighs
+    return cached('Day10.getNeighsMap', CACHE_VERSION, grid.cells, build)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getScore(coord:Coord, grid:Grid, neighs:dict, scoreCoords):
+def getScore(i:int, grid:Grid, neighs:dict, scoreCoords):
     ''' Recursive function to get the "score" of a given trailhead '''
 
     # Base case - we've reached a 9
-    if grid.grid[coord.r][coord.c] == '9':
-        scoreCoords.add(coord.toTuple())
+    if grid.cells[i] == NINE:
+        scoreCoords.add(i)
         return
     
     # Recursive case - make recursive call with each of our neighbors
-    for neighCoord in neighs[coord.toTuple()]:
-        getScore(neighCoord, grid, neighs, scoreCoords)
+    for neigh in neighs[i]:
+        getScore(neigh, grid, neighs, scoreCoords)
 
     return 
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
@@ -91,31 +67,31 @@ def task_1(inputs):
     out = 0
 
     # For each trailhead, get its score!
-    for r in range(grid.M):
-        for c in range(grid.N):
-            if grid.grid[r][c] == '0':
-                scoreCoords = set()
-                getScore(Coord(r,c), grid, neighs, scoreCoords)
-                out += len(scoreCoords)
+    for i in grid.indices():
+        if grid.cells[i] == ZERO:
+            scoreCoords = set()
+            getScore(i, grid, neighs, scoreCoords)
+            out += len(scoreCoords)
 
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getScore2(coord:Coord, grid:Grid, neighs:dict):
+def getScore2(i:int, grid:Grid, neighs:dict):
     ''' Recursive function to get the "score" of a given trailhead '''
 
     # Base case - we've reached a 9
-    if grid.grid[coord.r][coord.c] == '9':
+    if grid.cells[i] == NINE:
         return 1
     
     # Recursive case - make recursive call with each of our neighbors
     out = 0
-    for neighCoord in neighs[coord.toTuple()]:
-        out += getScore2(neighCoord, grid, neighs)
+    for neigh in neighs[i]:
+        out += getScore2(neigh, grid, neighs)
 
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
@@ -125,23 +101,41 @@ def task_2(inputs):
     out = 0
 
     # For each trailhead, get its score!
-    for r in range(grid.M):
-        for c in range(grid.N):
-            if grid.grid[r][c] == '0':
-                out += getScore2(Coord(r,c), grid, neighs)
+    for i in grid.indices():
+        if grid.cells[i] == ZERO:
+            out += getScore2(i, grid, neighs)
 
     return out
     
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, building our grid and neighbors map only once '''
+
+    # Initialize
+    grid = Grid(inputs)
+    neighs = getNeighsMap(grid)
+    part1, part2 = 0, 0
+
+    # For each trailhead, get both of its scores!
+    for i in grid.indices():
+        if grid.cells[i] == ZERO:
+            scoreCoords = set()
+            getScore(i, grid, neighs, scoreCoords)
+            part1 += len(scoreCoords)
+            part2 += getScore2(i, grid, neighs)
+
+    return part1, part2
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
     infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_1(inputs))
-
-    inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day10', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day10')
 
     return
 
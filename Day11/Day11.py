@@ -4,14 +4,12 @@
 '''
 
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.loader import read_input
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def transform(val:int) -> List[int]:
@@ -26,6 +24,7 @@ def transform(val:int) -> List[int]:
         return [val * 2024]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
@@ -43,51 +42,79 @@ def task_1(inputs):
     return len(vals)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('parse')
+def countStones(inputs) -> Dict[int, int]:
+    ''' Hashmap of stone value -> number of stones with that value '''
+
+    hashmap = {}
+    for inVal in [int(x) for x in inputs[0].split(' ')]:
+        hashmap[inVal] = hashmap.get(inVal, 0) + 1
+
+    return hashmap
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def blink(hashmap:Dict[int, int]) -> Dict[int, int]:
+    ''' Transform every stone once, returning a new value -> frequency hashmap '''
+
+    # Create a new hashmap for each iteration
+    newHashmap = {}
+
+    # Each value from our original hashmap will be transformed,  
+    # and then added to our newHashmap (freq) number of times.
+    # Ex: if we have 100 "25" stones and 50 "26" stones in hashmap 
+    #  -> newHashmap will get 150 "2" stones, 100 "5" stones, and 50 "6" stones
+    for val,freq in hashmap.items():
+        newVals = transform(val)
+        for newVal in newVals:
+            if newVal in newHashmap:
+                newHashmap[newVal] += freq 
+            else:
+                newHashmap[newVal] = freq
+
+    return newHashmap
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
     # This time around, let's use a hashmap instead of an array (since the ordering
     # of stones does not matter, only the number of occurences (i.e., frequency) of each)
-    hashmap = {}
-    inVals = [int(x) for x in inputs[0].split(' ')]   
-    for inVal in inVals:
-        hashmap[inVal] = 1
+    hashmap = countStones(inputs)
 
     # Now simulate 75 times!
     NUM_ITERS = 75  
     for _ in range(NUM_ITERS):
-
-        # Create a new hashmap for each iteration
-        newHashmap = {}
-
-        # Each value from our original hashmap will be transformed,  
-        # and then added to our newHashmap (freq) number of times.
-        # Ex: if we have 100 "25" stones and 50 "26" stones in hashmap 
-        #  -> newHashmap will get 150 "2" stones, 100 "5" stones, and 50 "6" stones
-        for val,freq in hashmap.items():
-            newVals = transform(val)
-            for newVal in newVals:
-                if newVal in newHashmap:
-                    newHashmap[newVal] += freq 
-                else:
-                    newHashmap[newVal] = freq
-        
-        # Now replace our existing hashmap with our newly crafted one
-        hashmap = newHashmap
+        hashmap = blink(hashmap)
     
     # The sum of all the values in the hashmap is the total number of stones
     return sum(hashmap.values())
 
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts in one simulation: part 1 is just a checkpoint at 25 blinks '''
+
+    hashmap = countStones(inputs)
+    for _ in range(25):
+        hashmap = blink(hashmap)
+    part1 = sum(hashmap.values())
+
+    # Keep going from where part 1 left off, up to 75 blinks total
+    for _ in range(75 - 25):
+        hashmap = blink(hashmap)
+
+    return part1, sum(hashmap.values())
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
     infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_1(inputs))
-
-    inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day11', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day11')
 
     return
 
@@ -4,222 +4,185 @@
 '''
 
 from pathlib import Path
-from queue import Queue
+from collections import deque
 from typing import List, Set, Tuple
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.grid import Grid
+from utils.loader import readGrid as read_input
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Coord():
-    ''' Helper class for giving us a coordinate on our grid '''
-    def __init__(self, r, c):
-        self.r = r
-        self.c = c
-
-    def toTuple(self):
-        return (self.r, self.c)
-
-    def getNeigh(self, cardinal:str):
-        ''' Return a Coord object in one of the four cardinal directions from us '''
-        if   cardinal == 'N':   return Coord(self.r - 1, self.c)
-        elif cardinal == 'S':   return Coord(self.r + 1, self.c)
-        elif cardinal == 'W':   return Coord(self.r, self.c - 1)
-        elif cardinal == 'E':   return Coord(self.r, self.c + 1)
-        else:                   raise SystemError()
-
-    def getOpenSides(self, region:Set[Tuple[int, int]]) -> Set[str]:
-        ''' Get the sides from us that don't contain a neighbor '''
-        sides = ['N','S','E','W']
-        return set([side for side in sides if self.getNeigh(side).toTuple() not in region])
+# Bump this whenever parsing changes, so stale cache entries get ignored
+CACHE_VERSION = 1
 
-    
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Grid():
-    ''' Helper class for storing properties of our grid '''
-
-    def __init__(self, grid):
-        self.grid = grid
-        self.M = len(grid)
-        self.N = len(grid[0])
-
-    def __contains__(self, coord:Coord) -> bool:
-        ''' So that we can do things like: if coord in grid '''
-        return 0 <= coord.r < self.M and 0 <= coord.c < self.N
-    
-    def valAt(self, coord:Coord) -> str:
-        return self.grid[coord.r][coord.c]
+def getOpenSides(i:int, grid:Grid, region:Set[int]) -> List[int]:
+    ''' Get the sides (as direction offsets) from us that don't contain a neighbor '''
+    return [d for d in grid.DIRS4 if i + d not in region]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def bfs(coord:Coord, grid:Grid, visited:set) -> Set[Tuple[int, int]]:
-    ''' Perform breadth first search to get all of the coords in a region '''
+def bfs(i:int, grid:Grid, visited:bytearray) -> Set[int]:
+    ''' Perform breadth first search to get all of the cell indices in a region '''
 
     # Initialization 
-    q = Queue()
-    q.put(coord)
+    q = deque([i])
     regionSet = set()
-    visited.add(coord.toTuple())
-    regionChar = grid.valAt(coord)
-    DIRS = [(-1, +0), (+1, +0), (+0, -1), (+0, +1)]
+    visited[i] = 1
+    regionChar = grid.cells[i]
 
     # Start iterating until empty queue
-    while not q.empty():
-
-        # Get current coordinate from queue, check each direction
-        coord = q.get()
-        for dr, dc in DIRS:
-            possNeigh = Coord(coord.r + dr, coord.c + dc)
-
-            # If this neighbor hasn't been visited yet, add it to queue
-            if (possNeigh in grid and 
-                possNeigh.toTuple() not in visited and
-                grid.valAt(possNeigh) == regionChar):
-
-                visited.add(possNeigh.toTuple())
-                q.put(possNeigh)
+    while q:
+
+        # Get current index from queue, check each direction
+        i = q.popleft()
+        if profiling.ENABLED:
+            profiling.count('bfs.pop')
+        for d in grid.DIRS4:
+            possNeigh = i + d
+
+            # If this neighbor hasn't been visited yet, add it to queue (SENTINEL 
+            # cells off the edge never match our region's character)
+            if not visited[possNeigh] and grid.cells[possNeigh] == regionChar:
+                visited[possNeigh] = 1
+                q.append(possNeigh)
         
         # Anything that has been in the queue is part of our region
-        regionSet.add(coord.toTuple())
+        regionSet.add(i)
 
     return regionSet
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getCircum(region:Set[Tuple[int, int]]) -> int:
+def getRegions(grid:Grid) -> List[Set[int]]:
+    ''' Run BFS to get a list of sets where each set is a region (cached if it's on) '''
+
+    def build():
+        visited = bytearray(len(grid.cells))
+        regionList = []
+        for i in grid.indices():
+            if not visited[i]:
+                regionList.append(bfs(i, grid, visited))
+        return regionList
+
+    return cached('Day12.getRegions', CACHE_VERSION, grid.cells, build)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def getCircum(region:Set[int], grid:Grid) -> int:
     ''' Get the circumference for a given region '''
 
-    # Get number of open sides for each coord in region, add those to output
+    # Get number of open sides for each index in region, add those to output
     circum = 0
-    for coord in region:
-        circum += len(Coord(*coord).getOpenSides(region))
+    for i in region:
+        circum += len(getOpenSides(i, grid, region))
     
     return circum
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
-    # Initialization
-    out = 0
-    visited = set()
-    regionList = []
+    # Get the circumference, area, and output value for each region
     grid = Grid(inputs)
-
-    # Run BFS to get a list of sets where each set is a region
-    for r in range(grid.M):
-        for c in range(grid.N):
-            if (r,c) not in visited:
-                regionSet = bfs(Coord(r,c), grid, visited)
-                regionList.append(regionSet)
-
-    # Now get the circumference, area, and output value for each region
     out = 0
-    for region in regionList:
-        circum = getCircum(region)
+    for region in getRegions(grid):
+        circum = getCircum(region, grid)
         area = len(region)
         out += circum * area
 
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def toThreeTuple(coord:Coord, cardinal:str) -> Tuple[int, int, int]:
-    ''' Given a Coord object and a cardinal direction, return unique 3-tuple '''
-    return coord.toTuple() + (cardinal,)
-
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getCircum2(region:Set[Tuple[int, int]]) -> int:
+def getCircum2(region:Set[int], grid:Grid) -> int:
     ''' Get circumference (i.e., number of unique sides) for region in part 2 '''
 
     # Initialization
     circum = 0
     visited = set()
     CHECK_MAP = {
-        'N': ('W', 'E'),
-        'S': ('W', 'E'),
-        'E': ('N', 'S'),
-        'W': ('N', 'S')
+        grid.UP:    (grid.LEFT, grid.RIGHT),
+        grid.DOWN:  (grid.LEFT, grid.RIGHT),
+        grid.RIGHT: (grid.UP, grid.DOWN),
+        grid.LEFT:  (grid.UP, grid.DOWN)
     }
 
-    # Iterate through each coordinate in the region
-    for coord in region:
-        coord = Coord(*coord)
+    # Iterate through each index in the region
+    for i in region:
 
-        # Need to check each open side direction for current coordinate
-        open_sides = coord.getOpenSides(region)
-        for cardinal in open_sides:
+        # Need to check each open side direction for current index
+        open_sides = getOpenSides(i, grid, region)
+        for side in open_sides:
 
-            # Now we should check directions perpendicular to cardinal direction
-            # Ex: If 'N' is our open side, then we need to check to the 'W' and 'E'
-            checkDirs = CHECK_MAP[cardinal]
+            # Now we should check directions perpendicular to side direction
+            # Ex: If UP is our open side, then we need to check to the LEFT and RIGHT
+            checkDirs = CHECK_MAP[side]
 
-            # ^^ Using previous example, if the 'N' sides of both our neighbor to the 'W'
-            # and neighbor to the 'E' haven't been visited yet, this is a new side          
-            if (toThreeTuple(coord.getNeigh(checkDirs[0]), cardinal) not in visited and 
-                toThreeTuple(coord.getNeigh(checkDirs[1]), cardinal) not in visited):
+            # ^^ Using previous example, if the UP sides of both our neighbor to the 
+            # LEFT and neighbor to the RIGHT haven't been visited yet, this is a new side          
+            if ((i + checkDirs[0], side) not in visited and 
+                (i + checkDirs[1], side) not in visited):
 
                 circum += 1
 
-            # Now add our (coordinate + cardinal direction) three-tuple to visited set
-            visited.add(toThreeTuple(coord, cardinal))
+            # Now add our (index, side direction) tuple to visited set
+            visited.add((i, side))
             
-            # ^^ Using previous example, now we need to keep moving westward and adding
-            # the 'N' sides of those coordinates to visited as long as they're valid 
+            # ^^ Using previous example, now we need to keep moving leftward and adding
+            # the UP sides of those indices to visited as long as they're valid 
             # neighbors with open sides
-            coordDir1 = coord.getNeigh(checkDirs[0])
-            while (coordDir1.toTuple() in region and 
-                   cardinal in coordDir1.getOpenSides(region)):
-                visited.add(toThreeTuple(coordDir1, cardinal))
-                coordDir1 = coordDir1.getNeigh(checkDirs[0])
-
-            # ^^ Using previous example, we need to also check all the options eastward
-            # while valid neighbors with open 'N' sides
-            coordDir2 = coord.getNeigh(checkDirs[1])
-            while (coordDir2.toTuple() in region and 
-                   cardinal in coordDir2.getOpenSides(region)):
-                visited.add(toThreeTuple(coordDir2, cardinal))
-                coordDir2 = coordDir2.getNeigh(checkDirs[1])
+            iDir1 = i + checkDirs[0]
+            while iDir1 in region and iDir1 + side not in region:
+                visited.add((iDir1, side))
+                iDir1 += checkDirs[0]
+
+            # ^^ Using previous example, we need to also check all the options rightward
+            # while valid neighbors with open UP sides
+            iDir2 = i + checkDirs[1]
+            while iDir2 in region and iDir2 + side not in region:
+                visited.add((iDir2, side))
+                iDir2 += checkDirs[1]
                 
     return circum
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
-    # Initialization
-    out = 0
-    visited = set()
-    regionList = []
+    # Get the circumference (num sides), area, and output value for each region
     grid = Grid(inputs)
-
-    # Run BFS to get a list of sets where each set is a region
-    for r in range(grid.M):
-        for c in range(grid.N):
-            if (r,c) not in visited:
-                regionSet = bfs(Coord(r,c), grid, visited)
-                regionList.append(regionSet)
-
-    # Now get the circumference (num sides), area, and output value for each region
     out = 0
-    for region in regionList:
-        circum = getCircum2(region)
+    for region in getRegions(grid):
+        circum = getCircum2(region, grid)
         area = len(region)
         out += circum * area
 
     return out
 
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, discovering each region with BFS only once '''
+
+    grid = Grid(inputs)
+    part1, part2 = 0, 0
+    for region in getRegions(grid):
+        area = len(region)
+        part1 += getCircum(region, grid) * area
+        part2 += getCircum2(region, grid) * area
+
+    return part1, part2
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
     infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_1(inputs))
-
-    inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day12', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day12')
 
     return
 
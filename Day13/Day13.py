@@ -4,34 +4,71 @@
 '''
 
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Tuple
 import re
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.loader import read_input, streamLines
+
+# How much further away each prize is in part 2
+PART2_OFFSET = 10000000000000
+
+# Bump this whenever parsing changes, so stale cache entries get ignored
+CACHE_VERSION = 1
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 class Game():
     ''' Helper class for defining a single instance of a game '''
     def __init__(self, chunk:List[str], part2:bool=False):
-        conversion = 10000000000000 if part2 else 0
+        conversion = PART2_OFFSET if part2 else 0
         self.A = tuple([int(x[1:]) for x in re.findall('\+\d+', chunk[0])])
         self.B = tuple([int(x[1:]) for x in re.findall('\+\d+', chunk[1])])
         self.Prize = tuple([int(x[1:])+conversion for x in re.findall('\=\d+', chunk[2])])
 
+    @classmethod
+    def fromValues(cls, A:Tuple[int, int], B:Tuple[int, int], Prize:Tuple[int, int]) -> 'Game':
+        ''' Build a game from already parsed values (no re-parsing) '''
+        game = cls.__new__(cls)
+        game.A, game.B, game.Prize = A, B, Prize
+        return game
+
+    def toPart2(self) -> 'Game':
+        ''' Same game, but with the far away part 2 prize location '''
+        return Game.fromValues(self.A, self.B, tuple([x + PART2_OFFSET for x in self.Prize]))
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def parseInputs(inputs:List[str], part2:bool=False) -> List[Game]:
-    ''' Populate our inputs into a list of games '''
+def iterChunks(lines:Iterable[str]) -> Iterator[List[str]]:
+    ''' Group our lines into the blank-line separated chunks that define each game '''
 
-    games = []
-    for i in range(0, len(inputs), 4):
-        games.append(Game(inputs[i:i+4], part2))
+    chunk = []
+    for line in lines:
+        if line:
+            chunk.append(line)
+        elif chunk:
+            yield chunk
+            chunk = []
 
-    return games
+    # Last chunk might not have a blank line after it
+    if chunk:
+        yield chunk
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('parse')
+def parseInputs(inputs:Iterable[str], part2:bool=False) -> List[Game]:
+    ''' Populate our inputs into a list of games (via the parse cache if it's on) '''
+
+    def parse():
+        games = []
+        for chunk in iterChunks(inputs):
+            game = Game(chunk, part2)
+            games.append((game.A, game.B, game.Prize))
+        return games
+
+    name = 'Day13.parseInputs' + ('.part2' if part2 else '')
+    return [Game.fromValues(*vals) for vals in cached(name, CACHE_VERSION, inputs, parse)]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def numTokens(numA:int, numB:int) -> int:
@@ -66,6 +103,7 @@ def runGame(game:Game) -> int:
     return -1
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
@@ -125,6 +163,7 @@ def runGame2(game:Game) -> int:
     return numTokens(numArounded, numBrounded)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
 def task_2(inputs):
     ''' Solve part 2 '''
 
@@ -140,16 +179,53 @@ def task_2(inputs):
 
     return out
 
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_stream(lines:Iterable[str]) -> Tuple[int, int]:
+    ''' Solve both parts in a single pass, one game in memory at a time '''
+
+    part1, part2 = 0, 0
+    for chunk in iterChunks(lines):
+        game = Game(chunk)
+        gameVal = runGame(game)
+        if gameVal > 0:
+            part1 += gameVal
+        gameVal = runGame2(game.toPart2())
+        if gameVal > 0:
+            part2 += gameVal
+
+    return part1, part2
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts together, parsing each game only once '''
+
+    part1, part2 = 0, 0
+    for game in parseInputs(inputs):
+        gameVal = runGame(game)
+        if gameVal > 0:
+            part1 += gameVal
+        gameVal = runGame2(game.toPart2())
+        if gameVal > 0:
+            part2 += gameVal
+
+    return part1, part2
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file (or "-" for stdin), stream it through in a single pass instead
+    if len(sys.argv) > 1:
+        for answer in solve_stream(streamLines(sys.argv[1])):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day13', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day13')
 
     return
 
@@ -4,15 +4,21 @@
 '''
 
 from pathlib import Path
-from typing import List, Dict
+from array import array
+from typing import Dict, Iterable, List, Tuple
 import math
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.loader import read_input, streamLines
+
+# Bump this whenever parsing changes, so stale cache entries get ignored
+CACHE_VERSION = 1
+
+# Robots as (x, y, vx, vy) columns, for when we need to hold on to a lot of them
+Columns = Tuple[array, array, array, array]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 class Coord():
@@ -28,15 +34,26 @@ class Robot():
         self.pos = Coord(*[int(x) for x in line.split(' ')[0][2:].split(',')])
         self.vel = Coord(*[int(x) for x in line.split(' ')[1][2:].split(',')])
 
+    @classmethod
+    def fromValues(cls, px:int, py:int, vx:int, vy:int) -> 'Robot':
+        ''' Build a robot from already parsed values (no re-parsing) '''
+        robot = cls.__new__(cls)
+        robot.pos, robot.vel = Coord(px, py), Coord(vx, vy)
+        return robot
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def parseInputs(inputs:str) -> List[Robot]:
-    ''' Pre-process our inputs into a list of robots '''
+@profiling.timed('parse')
+def parseInputs(inputs:Iterable[str]) -> List[Robot]:
+    ''' Pre-process our inputs into a list of robots (via the parse cache if it's on) '''
 
-    robots = []
-    for input in inputs:
-        robots.append(Robot(input))
+    def parse():
+        robots = []
+        for input in inputs:
+            robot = Robot(input)
+            robots.append((robot.pos.x, robot.pos.y, robot.vel.x, robot.vel.y))
+        return robots
 
-    return robots
+    return [Robot.fromValues(*vals) for vals in cached('Day14.parseInputs', CACHE_VERSION, inputs, parse)]
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def getRobotFinalPos(robot:Robot, WIDTH:int, HEIGHT:int, TIME:int) -> Coord:
@@ -75,21 +92,24 @@ def getQuad(finalPos:Coord, quad:Dict[str, int], WIDTH:int, HEIGHT:int):
     return 
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def getDims(firstRobot:Robot) -> Tuple[int, int]:
+    ''' Figure out our (WIDTH, HEIGHT) based on the first robot in our inputs '''
+
+    # If true, use sample.txt dimensions, else input.txt dimensions
+    if firstRobot.pos.x == 0:
+        return 11, 7
+    else:
+        return 101, 103
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part1')
 def task_1(inputs):
     ''' Solve part 1 '''
 
     # Get our inputs
     robots = parseInputs(inputs)
-
-    # If true, use sample.txt dimensions, else input.txt dimensions
-    if robots[0].pos.x == 0:
-        WIDTH = 11
-        HEIGHT = 7
-        TIME = 100
-    else:
-        WIDTH = 101
-        HEIGHT = 103
-        TIME = 100
+    WIDTH, HEIGHT = getDims(robots[0])
+    TIME = 100
 
     # How many robots are in each quad
     quads = {
@@ -108,28 +128,33 @@ def task_1(inputs):
     return math.prod(list(quads.values()))
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def task_2(inputs):
-    ''' Solve part 2 '''
+def toColumns(robots:Iterable[Robot]) -> Columns:
+    ''' Our robots as (x, y, vx, vy) int columns, one plain int per value '''
 
-    # Get our inputs
-    robots = parseInputs(inputs)
+    columns = tuple(array('q') for _ in range(4))
+    for robot in robots:
+        addRobot(columns, robot)
 
-    # If true, use sample.txt dimensions, else input.txt dimensions
-    if robots[0].pos.x == 0:
-        WIDTH = 11
-        HEIGHT = 7
-    else:
-        WIDTH = 101
-        HEIGHT = 103
+    return columns
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def addRobot(columns:Columns, robot:Robot):
+    ''' Append one robot's position and velocity onto our columns '''
+
+    for column, val in zip(columns, (robot.pos.x, robot.pos.y, robot.vel.x, robot.vel.y)):
+        column.append(val)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def findTree(columns:Columns, WIDTH:int, HEIGHT:int) -> int:
+    ''' Simulate our robots (as columns) until they line up into a christmas tree '''
 
     # Just simulate for awhile...
     for time in range(1000000):
 
         # 2D array defining robot positions
         grid = [['.' for i in range(WIDTH)] for j in range(HEIGHT)]
-        for robot in robots:
-            finalPos = getRobotFinalPos(robot, WIDTH, HEIGHT, time)
-            grid[finalPos.y][finalPos.x] = '#'
+        for x, y, vx, vy in zip(*columns):
+            grid[(y + vy * time) % HEIGHT][(x + vx * time) % WIDTH] = '#'
 
         # Now squash our 2D array into a single string
         gridSquashedStr = ''.join([''.join(x) for x in grid])
@@ -137,6 +162,8 @@ def task_2(inputs):
         # Check if that string has a long line of ######## values which means
         # a lot of robots in a horizontal row (i.e., bottom portion of tree)
         if '##########' in gridSquashedStr:
+            if profiling.ENABLED:
+                profiling.count('findTree.steps', time + 1)
             return time
         
         # Just to show how many iterations we've gone through...
@@ -146,16 +173,73 @@ def task_2(inputs):
     # Yikes if we've gotten here...
     raise SystemError()
 
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
+def task_2(inputs):
+    ''' Solve part 2 '''
+
+    # Get our inputs
+    robots = parseInputs(inputs)
+    WIDTH, HEIGHT = getDims(robots[0])
+
+    return findTree(toColumns(robots), WIDTH, HEIGHT)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def solve_stream(lines:Iterable[str]) -> Tuple[int, int]:
+    ''' 
+    Solve part 1 in a single pass, one robot at a time. Part 2 has to simulate 
+    every robot over and over though, so we do still hold on to those, just as
+    four compact int columns rather than a Robot per line
+    '''
+
+    columns = toColumns(())
+    quads = {'NW': 0, 'NE': 0, 'SW': 0, 'SE': 0}
+    for line in lines:
+        if not line:
+            continue
+        robot = Robot(line)
+        if not columns[0]:
+            WIDTH, HEIGHT = getDims(robot)
+        addRobot(columns, robot)
+
+        # Part 1 only needs where this robot is at time 100
+        getQuad(getRobotFinalPos(robot, WIDTH, HEIGHT, 100), quads, WIDTH, HEIGHT)
+
+    # Can't figure out our dimensions (or find a tree) without any robots
+    if not columns[0]:
+        raise ValueError('No robots in our input')
+
+    return math.prod(list(quads.values())), findTree(columns, WIDTH, HEIGHT)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts together, parsing each robot only once '''
+
+    robots = parseInputs(inputs)
+    WIDTH, HEIGHT = getDims(robots[0])
+
+    quads = {'NW': 0, 'NE': 0, 'SW': 0, 'SE': 0}
+    for robot in robots:
+        getQuad(getRobotFinalPos(robot, WIDTH, HEIGHT, 100), quads, WIDTH, HEIGHT)
+
+    return math.prod(list(quads.values())), findTree(toColumns(robots), WIDTH, HEIGHT)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
-    infile = Path(__file__).parent / 'input.txt'
+    # Given a file (or "-" for stdin), stream it through in a single pass instead
+    if len(sys.argv) > 1:
+        for answer in solve_stream(streamLines(sys.argv[1])):
+            print(answer)
+        return
 
-    inputs = read_input(infile)
-    print(task_1(inputs))
+    infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day14', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day14')
 
     return
 
@@ -5,148 +5,130 @@
 
 from pathlib import Path
 from typing import List, Tuple
+import sys
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def read_input(infile):
-    with open(infile, 'r') as f:
-        data = f.readlines()
-    data = [x.strip() for x in data]
-    return data
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import profiling
+from utils.cache import cached
+from utils.grid import Grid
+from utils.loader import read_input
 
-#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Coord():
-    ''' Helper class for defining a (row, col) position '''
-    def __init__(self, r, c):
-        self.r = r
-        self.c = c
-
-    def toTuple(self):
-        return (self.r, self.c)
-    
-    def getNeigh(self, move:str):
-        ''' Get a Coord object for adjacent neighbor in "move" direction '''
-        if   move == '^': return Coord(self.r - 1, self.c)
-        elif move == 'v': return Coord(self.r + 1, self.c)
-        elif move == '>': return Coord(self.r, self.c + 1)
-        elif move == '<': return Coord(self.r, self.c - 1)
-        else:             raise SystemError()
-
-    def getOtherHalf(self, val:str):
-        ''' For part 2: get the coordinate of the other half of the box '''
-        return self.getNeigh('>') if val == '[' else self.getNeigh('<')
+# Cell values for everything that can be in our warehouse
+WALL, EMPTY, ROBOT = ord('#'), ord('.'), ord('@')
+BOX, LBOX, RBOX = ord('O'), ord('['), ord(']')
+BOX_HALVES = {LBOX, RBOX}
+MOVABLE = {ROBOT, BOX, LBOX, RBOX}
+
+# Bump this whenever parsing changes, so stale cache entries get ignored
+CACHE_VERSION = 1
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-class Grid():
+class Warehouse(Grid):
     ''' Helper class for storing properties of our grid '''
 
     def __init__(self, inputs, part2=False):
-        self.grid = []
-
-        # For part1, basically just make a 2D array
-        if not part2:
-            for input in inputs:
-                self.grid.append([ch for ch in input])
-        
-        # For part 2, we gotta do a little bit of extra processing
-        else:
-            for input in inputs:
-                listOfTups = [self.__p2(ch) for ch in input]
-                self.grid.append([ch for tup in listOfTups for ch in tup])
 
-        # Also initialize with our grid dimensions and robot location
-        self.M = len(self.grid)
-        self.N = len(self.grid[0])
+        # For part1, the grid is just our input. For part 2, we gotta do a little 
+        # bit of extra processing
+        if part2:
+            inputs = [''.join([self.__p2(ch) for ch in input]) for input in inputs]
+        super().__init__(inputs)
+
+        # Also initialize with our robot location and move direction offsets
         self.robot = None
+        self.MOVES = {'^': self.UP, 'v': self.DOWN, '>': self.RIGHT, '<': self.LEFT}
 
-    def __p2(self, ch:str) -> Tuple[str, str]:
+    def __p2(self, ch:str) -> str:
         ''' Helper for initializing our grid in part 2 '''
-        if   ch == '#': return ('#', '#')
-        elif ch == 'O': return ('[', ']')
-        elif ch == '.': return ('.', '.')
-        elif ch == '@': return ('@', '.')
+        if   ch == '#': return '##'
+        elif ch == 'O': return '[]'
+        elif ch == '.': return '..'
+        elif ch == '@': return '@.'
         else:           raise SystemError()
 
-    def __contains__(self, coord:Coord) -> bool:
-        ''' So that we can do things like: if coord in grid '''
-        return 0 <= coord.r < self.M and 0 <= coord.c < self.N
-    
-    def getValAt(self, coord:Coord) -> str:
-        return self.grid[coord.r][coord.c]
-    
-    def setValAt(self, coord:Coord, val:str):
-        self.grid[coord.r][coord.c] = val
-        return
-    
-    def moveFromTo(self, fromCoord:Coord, toCoord:Coord):
-        ''' Given a from coordinate and a to coordinate, complete our move '''
+    def getOtherHalf(self, i:int) -> int:
+        ''' For part 2: get the index of the other half of the box at i '''
+        return i + self.RIGHT if self.cells[i] == LBOX else i + self.LEFT
+
+    def moveFromTo(self, fromI:int, toI:int):
+        ''' Given a from index and a to index, complete our move '''
+
+        if profiling.ENABLED:
+            profiling.count('moveFromTo')
 
         # These should always be true, might be a bug in our logic if not
-        assert self.getValAt(toCoord) == '.'
-        assert self.getValAt(fromCoord) in {'@', 'O', '[', ']'}
+        assert self.cells[toI] == EMPTY
+        assert self.cells[fromI] in MOVABLE
 
         # Reset location of objects accordingly 
-        self.setValAt(toCoord, self.getValAt(fromCoord))
-        self.setValAt(fromCoord, '.')
+        self.cells[toI] = self.cells[fromI]
+        self.cells[fromI] = EMPTY
 
         # If our robot is involved, also reset its location
-        if self.getValAt(toCoord) == '@':
-            self.robot = Coord(toCoord.r, toCoord.c)
+        if self.cells[toI] == ROBOT:
+            self.robot = toI
 
         return
     
-    def getRobot(self):
-        ''' Return Coord object of our robot's current location '''
+    def getRobot(self) -> int:
+        ''' Return index of our robot's current location '''
         if self.robot is None:
-            for r in range(self.M):
-                for c in range(self.N):
-                    if self.grid[r][c] == '@':
-                        self.robot = Coord(r,c)
+            self.robot = self.find(b'@')
 
         return self.robot
     
     
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def parseInputs(inputs:List[str], part2=False) -> Tuple[Grid, str]:
-    ''' Helper for parsing our inputs into a Grid object and a list of moves '''
+@profiling.timed('parse')
+def splitInputs(inputs:List[str]) -> Tuple[List[str], str]:
+    ''' Helper for splitting our inputs into the grid's rows and a string of moves '''
 
-    iBreak = [i for i,input in enumerate(inputs) if len(input) == 0][0]
-    grid = Grid(inputs[:iBreak], part2=part2)
-    moves = ''.join(inputs[iBreak+1:])
+    def parse():
+        iBreak = [i for i,input in enumerate(inputs) if len(input) == 0][0]
+        return list(inputs[:iBreak]), ''.join(inputs[iBreak+1:])
 
-    return grid, moves
+    return cached('Day15.parseInputs', CACHE_VERSION, inputs, parse)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def attemptMove(grid:Grid, move:str):
+def parseInputs(inputs:List[str], part2=False) -> Tuple[Warehouse, str]:
+    ''' Helper for parsing our inputs into a Warehouse object and a list of moves '''
+
+    rows, moves = splitInputs(inputs)
+    return Warehouse(rows, part2=part2), moves
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def attemptMove(grid:Warehouse, move:str):
     ''' Attempt our move (for part 1) only '''
 
-    # We need to make a stack of potential coordinates to be moved
+    # We need to make a stack of potential indices to be moved
     stack = []
+    step = grid.MOVES[move]
 
     # Current robot's location
-    robotCoord = grid.getRobot()
-    stack.append(robotCoord)
+    robot = grid.getRobot()
+    stack.append(robot)
 
     # Location we're trying to move to
-    nextCoord = robotCoord.getNeigh(move)
-    stack.append(nextCoord)
+    nextI = robot + step
+    stack.append(nextI)
 
     # As long as we've got a string of boxes, keep checking next location in same direction
-    while grid.getValAt(nextCoord) == 'O':
-        nextCoord = nextCoord.getNeigh(move)
-        stack.append(nextCoord)
+    while grid.cells[nextI] == BOX:
+        nextI += step
+        stack.append(nextI)
 
     # If we've reached a wall, we can't complete this move, so return with no side effects
-    if grid.getValAt(nextCoord) == '#':
+    if grid.cells[nextI] == WALL:
         return
     
     # If we've reached an open space, then complete our move!
-    if grid.getValAt(nextCoord) == '.':
+    if grid.cells[nextI] == EMPTY:
 
         # Basically just move our objects one at a time
         while len(stack) > 1:
-            moveToCoord = stack.pop()
-            moveFromCoord = stack[-1]
-            grid.moveFromTo(moveFromCoord, moveToCoord)
+            moveTo = stack.pop()
+            moveFrom = stack[-1]
+            grid.moveFromTo(moveFrom, moveTo)
 
         return
 
@@ -154,62 +136,68 @@ def attemptMove(grid:Grid, move:str):
     raise SystemError()
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def getScore(grid:Grid, part2=False) -> int:
+def getScore(grid:Warehouse, part2=False) -> int:
     ''' Return the "score" of the grid (after all moves are completed) '''
 
-    boxStr = 'O' if not part2 else '['
+    boxVal = BOX if not part2 else LBOX
 
     out = 0
-    for r in range(grid.M):
-        for c in range(grid.N):
-            if grid.getValAt(Coord(r,c)) == boxStr:
-                out += 100 * r + c
+    for i in grid.indices():
+        if grid.cells[i] == boxVal:
+            r, c = grid.coord(i)
+            out += 100 * r + c
 
     return out
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def task_1(inputs):
-    ''' Solve part 1 '''
+def runMoves(grid:Warehouse, moves:str) -> int:
+    ''' Do every move (part 1 style) and return the final score '''
 
     # Do the thing!
-    grid, moves = parseInputs(inputs)
     for move in moves:
         attemptMove(grid, move)
 
     return getScore(grid)
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def attemptHorizMove(grid:Grid, move:str):
+@profiling.timed('part1')
+def task_1(inputs):
+    ''' Solve part 1 '''
+    return runMoves(*parseInputs(inputs))
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def attemptHorizMove(grid:Warehouse, move:str):
     ''' Attempt a horizontal move (for part 2) only '''
 
-    # We need to make a stack of potential coordinates to be moved
+    # We need to make a stack of potential indices to be moved
     stack = []
+    step = grid.MOVES[move]
 
     # Current robot's location
-    robotCoord = grid.getRobot()
-    stack.append(robotCoord)
+    robot = grid.getRobot()
+    stack.append(robot)
 
     # Location we're trying to move to
-    nextCoord = robotCoord.getNeigh(move)
-    stack.append(nextCoord)
+    nextI = robot + step
+    stack.append(nextI)
 
     # As long as we've got a string of boxes, keep checking next location in same direction
-    while grid.getValAt(nextCoord) in {'[', ']'}:
-        nextCoord = nextCoord.getNeigh(move)
-        stack.append(nextCoord)
+    while grid.cells[nextI] in BOX_HALVES:
+        nextI += step
+        stack.append(nextI)
 
     # If we've reached a wall, we can't complete this move, so return with no side effects
-    if grid.getValAt(nextCoord) == '#':
+    if grid.cells[nextI] == WALL:
         return
     
     # If we've reached an open space, then complete our move!
-    if grid.getValAt(nextCoord) == '.':
+    if grid.cells[nextI] == EMPTY:
 
         # Basically just move our objects one at a time
         while len(stack) > 1:
-            moveToCoord = stack.pop()
-            moveFromCoord = stack[-1]
-            grid.moveFromTo(moveFromCoord, moveToCoord)
+            moveTo = stack.pop()
+            moveFrom = stack[-1]
+            grid.moveFromTo(moveFrom, moveTo)
 
         return
 
@@ -217,33 +205,34 @@ def attemptHorizMove(grid:Grid, move:str):
     raise SystemError()
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def attemptVertMove(grid:Grid, move:str):
+def attemptVertMove(grid:Warehouse, move:str):
     ''' Attempt a vertical move (part 2 only) '''
 
-    # Stack of lists of potential coordinates to be moved
+    # Stack of lists of potential indices to be moved
     stack = []
+    step = grid.MOVES[move]
 
     # Current robot's location
-    robotCoord = grid.getRobot()
-    stack.append([robotCoord])
+    robot = grid.getRobot()
+    stack.append([robot])
 
-    # Each element in the stack will be it's own list of Coords for a given row index
+    # Each element in the stack will be it's own list of indices for a given row
     # If we visit a row of only empty spaces -> then we'll end up adding an empty list to our stack
     while len(stack[-1]) > 0:
         currRow = stack[-1]
         nextRow = []
 
         # Now for each element in the last row we visited, check each neighbor to the N or S
-        for coord in currRow:
-            neighbor = coord.getNeigh(move)
+        for i in currRow:
+            neighbor = i + step
 
             # If our neighbor is part of a box, add both parts of the box to our list
-            if grid.getValAt(neighbor) in {'[', ']'}:
+            if grid.cells[neighbor] in BOX_HALVES:
                 nextRow.append(neighbor)
-                nextRow.append(neighbor.getOtherHalf(grid.getValAt(neighbor)))
+                nextRow.append(grid.getOtherHalf(neighbor))
 
             # If any part of our path is blocked by a wall, return immediately cuz we can't move!
-            if grid.getValAt(neighbor) == '#':
+            if grid.cells[neighbor] == WALL:
                 return
 
         # Now append our most recently visited row to the stack
@@ -256,25 +245,20 @@ def attemptVertMove(grid:Grid, move:str):
     while len(stack) > 0:
         currRow = stack.pop()
 
-        # Potential for duplication when adding values in, just convert to stack to de-duplicate
-        currRow = set([x.toTuple() for x in currRow])
-        for coordTuple in currRow:
-            coord = Coord(*coordTuple)
+        # Potential for duplication when adding values in, just convert to set to de-duplicate
+        for moveFrom in set(currRow):
 
-            # Use our Grid helper function to actually complete this move
-            moveFromCoord = coord
-            moveToCoord = moveFromCoord.getNeigh(move)
-            grid.moveFromTo(moveFromCoord, moveToCoord)
+            # Use our Warehouse helper function to actually complete this move
+            grid.moveFromTo(moveFrom, moveFrom + step)
 
     # Yay we're done!
     return
 
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-def task_2(inputs):
-    ''' Solve part 2 '''
+def runMoves2(grid:Warehouse, moves:str) -> int:
+    ''' Do every move (part 2 style) and return the final score '''
 
     # Do the thing (part 2 style)!
-    grid, moves = parseInputs(inputs, part2=True)
     for move in moves:
         if move in {'<', '>'}:
             attemptHorizMove(grid, move)
@@ -283,16 +267,28 @@ def task_2(inputs):
 
     return getScore(grid, part2=True)
 
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('part2')
+def task_2(inputs):
+    ''' Solve part 2 '''
+    return runMoves2(*parseInputs(inputs, part2=True))
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('solve_both')
+def solve_both(inputs) -> Tuple[int, int]:
+    ''' Solve both parts, splitting out the rows and moves only once '''
+    rows, moves = splitInputs(inputs)
+    return runMoves(Warehouse(rows), moves), runMoves2(Warehouse(rows, part2=True), moves)
+
 #++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 def main():
 
     infile = Path(__file__).parent / 'input.txt'
 
     inputs = read_input(infile)
-    print(task_1(inputs))
-
-    inputs = read_input(infile)
-    print(task_2(inputs))
+    for answer in profiling.run('Day15', solve_both, inputs):
+        print(answer)
+    profiling.dump('Day15')
 
     return
 
@@ -0,0 +1,259 @@
+'''
+    What: Advent of Code 2024 - Benchmark every day's solvers on scaled inputs
+    Who: Josh Geiser
+
+    Usage: python bench.py [--days 1 9] [--scales 1 10 100] [--save] [--baseline FILE]
+
+    Each day's input.txt gets scaled up (more lines, bigger tiled grids, longer
+    disk maps/move strings, etc.), and each part gets timed on every scale.
+    Median/p95 timings and peak memory get compared against a JSON baseline.
+'''
+
+from pathlib import Path
+from typing import Callable, Dict, List
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import math
+import statistics
+import time
+import tracemalloc
+
+from run_all import ROOT, PARTS, FUSED, findDays, loadDay
+
+BENCH_DIR = ROOT / 'bench_inputs'
+BASELINE = ROOT / 'bench_baseline.json'
+
+# Bump this whenever a scaler changes, so previously generated inputs get remade
+SCALER_VERSION = 1
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def repeatLines(lines:List[str], k:int) -> List[str]:
+    ''' One record per line (Day01/02/03/07/14): just repeat the records k times '''
+    return lines * k
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def tileGrid(lines:List[str], k:int, unique:str='') -> List[str]:
+    '''
+    Tile a grid roughly sqrt(k) x sqrt(k) times so its area grows ~k times. Any
+    characters in "unique" (e.g., the Day06 guard) are only kept in the first tile
+    '''
+
+    tilesR = max(1, round(math.sqrt(k)))
+    tilesC = math.ceil(k / tilesR)
+
+    # Blank out the unique characters in a copy of the grid used for other tiles
+    blank = lines
+    for ch in unique:
+        blank = [line.replace(ch, '.') for line in blank]
+
+    out = []
+    for tileR in range(tilesR):
+        for r in range(len(lines)):
+            first = lines[r] if tileR == 0 else blank[r]
+            out.append(first + blank[r] * (tilesC - 1))
+
+    return out
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def scaleSections(lines:List[str], k:int, section:int) -> List[str]:
+    ''' Input is two blank-line separated sections, repeat one of them k times '''
+
+    iBreak = lines.index('')
+    first, second = lines[:iBreak], lines[iBreak+1:]
+    if section == 0:
+        return first * k + [''] + second
+    return first + [''] + second * k
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def scaleDay09(lines:List[str], k:int) -> List[str]:
+    ''' Longer disk map: glue copies together with a zero-length free space '''
+    return ['0'.join([lines[0]] * k)]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def scaleDay11(lines:List[str], k:int) -> List[str]:
+    ''' More stones on the single input line '''
+    return [' '.join([lines[0]] * k)]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def scaleDay13(lines:List[str], k:int) -> List[str]:
+    ''' More claw machines: each one is a block of 3 lines plus a blank line '''
+    blocks = lines if lines[-1] == '' else lines + ['']
+    return (blocks * k)[:-1]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def scaleDay15(lines:List[str], k:int) -> List[str]:
+    ''' Same warehouse, k times as many robot moves '''
+    return scaleSections(lines, k, section=1)
+
+# How each day's input gets scaled up by a factor of k
+SCALERS: Dict[int, Callable[[List[str], int], List[str]]] = {
+    1:  repeatLines,
+    2:  repeatLines,
+    3:  repeatLines,
+    4:  tileGrid,
+    5:  lambda lines, k: scaleSections(lines, k, section=1),
+    6:  lambda lines, k: tileGrid(lines, k, unique='^'),
+    7:  repeatLines,
+    8:  tileGrid,
+    9:  scaleDay09,
+    10: tileGrid,
+    11: scaleDay11,
+    12: tileGrid,
+    13: scaleDay13,
+    14: repeatLines,
+    15: scaleDay15,
+}
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def makeInput(day:int, solver:Path, scale:int) -> Path:
+    ''' Get the path of the (possibly generated) input file for a day at a scale '''
+
+    infile = solver.parent / 'input.txt'
+    if scale == 1:
+        return infile
+
+    # Generated inputs are deterministic, so only write them out once per version
+    # of input.txt and of our scalers (both go into the file name)
+    content = infile.read_bytes()
+    digest = hashlib.sha256(f'{SCALER_VERSION}:'.encode() + content).hexdigest()[:12]
+    outfile = BENCH_DIR / f'Day{day:02d}_x{scale}_{digest}.txt'
+    if not outfile.is_file():
+        BENCH_DIR.mkdir(exist_ok=True)
+
+        # Anything generated from an older input.txt or scaler is just stale now
+        for stale in BENCH_DIR.glob(f'Day{day:02d}_x{scale}.txt'):
+            stale.unlink()
+        for stale in BENCH_DIR.glob(f'Day{day:02d}_x{scale}_*.txt'):
+            stale.unlink()
+
+        # Write to a temp file first, so a half written input never gets reused
+        lines = [x.strip() for x in str(content, 'utf-8').splitlines()]
+        tmpfile = outfile.with_suffix('.tmp')
+        with open(tmpfile, 'w') as f:
+            f.write('\n'.join(SCALERS[day](lines, scale)) + '\n')
+        tmpfile.replace(outfile)
+
+    return outfile
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def percentile(vals:List[float], pct:float) -> float:
+    ''' Nearest-rank percentile, fine for the handful of repeats we do '''
+    vals = sorted(vals)
+    return vals[max(0, math.ceil(pct / 100 * len(vals)) - 1)]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def benchPart(func, inputs, repeat:int) -> dict:
+    ''' Time a single part "repeat" times, then do one more run to get peak memory '''
+
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            answer = func(inputs)
+            times.append(time.perf_counter() - start)
+
+        # tracemalloc slows things down a bunch, so keep it out of the timed runs
+        tracemalloc.start()
+        func(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'answer': str(answer),
+        'median': statistics.median(times),
+        'p95': percentile(times, 95),
+        'peak_bytes': peak,
+    }
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def compare(key:str, result:dict, baseline:dict, tolerance:float, minTime:float) -> str:
+    ''' Return a short note if this result regressed (or changed its answer) compared to our baseline '''
+
+    if key not in baseline:
+        return 'new'
+
+    old = baseline[key]
+    notes = []
+
+    # Really quick parts are mostly timer noise, so don't flag those on time
+    if result['median'] > max(old['median'] * (1 + tolerance), minTime):
+        notes.append(f"REGRESSION time x{result['median'] / old['median']:.2f}")
+    if result['peak_bytes'] > old['peak_bytes'] * (1 + tolerance):
+        notes.append(f"REGRESSION mem x{result['peak_bytes'] / max(1, old['peak_bytes']):.2f}")
+    if result['answer'] != old['answer']:
+        notes.append('ANSWER CHANGED')
+
+    return ', '.join(notes) if notes else 'ok'
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark DayNN solvers on scaled inputs')
+    parser.add_argument('--days', type=int, nargs='+', default=None,
+                        help='which days to benchmark (default: all of them)')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='input scale factors, 1 is the plain input.txt')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed runs per part')
+    parser.add_argument('--budget', type=float, default=60.0,
+                        help='skip larger scales of a day once a part takes longer than this (s)')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative slowdown allowed before flagging a regression')
+    parser.add_argument('--min-time', type=float, default=0.01,
+                        help='never flag a time regression for parts faster than this (s)')
+    parser.add_argument('--baseline', type=Path, default=BASELINE,
+                        help='JSON baseline to compare against / save to')
+    parser.add_argument('--save', action='store_true',
+                        help='write these results out as the new baseline')
+    args = parser.parse_args()
+
+    solvers = findDays()
+    days = args.days if args.days else list(solvers)
+
+    baseline = {}
+    if args.baseline.is_file():
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressed = False
+    for day in days:
+        module = loadDay(solvers[day])
+        for scale in sorted(args.scales):
+            inputs = module.read_input(makeInput(day, solvers[day], scale))
+
+            # Run each part (and both fused together), flagging anything slower than our baseline
+            overBudget = False
+            for part in PARTS + (FUSED,):
+                key = f'Day{day:02d}/{part}/x{scale}'
+                result = benchPart(getattr(module, part), inputs, args.repeat)
+                results[key] = result
+
+                note = compare(key, result, baseline, args.tolerance, args.min_time)
+                regressed |= note not in ('ok', 'new')
+                print(f"{key:<20} median {result['median']:9.4f} s  p95 {result['p95']:9.4f} s  "
+                      f"peak {result['peak_bytes'] / 2**20:9.2f} MiB  {note}", flush=True)
+
+                overBudget |= result['median'] > args.budget
+
+            # No point in trying even bigger inputs if this one already took forever
+            if overBudget:
+                print(f'Day{day:02d}: over the {args.budget} s budget, skipping larger scales')
+                break
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+
+    if regressed:
+        raise SystemExit(1)
+
+    return
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+if __name__ == '__main__':
+    main()
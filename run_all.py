@@ -0,0 +1,159 @@
+'''
+    What: Advent of Code 2024 - Run every day's solvers in parallel
+    Who: Josh Geiser
+
+    Usage: python run_all.py [--workers N] [--days 1 6 12] [--input sample.txt] [--fused] [--cache]
+                              [--profile report.json] [--pstats DIR]
+'''
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import time
+
+from utils import profiling
+
+ROOT = Path(__file__).parent
+PARTS = ('task_1', 'task_2')
+FUSED = 'solve_both'
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def findDays() -> Dict[int, Path]:
+    ''' Get a hashmap of day number -> path to that day's DayNN.py solver '''
+
+    days = {}
+    for dayDir in sorted(ROOT.glob('Day[0-9][0-9]')):
+        solver = dayDir / f'{dayDir.name}.py'
+        if solver.is_file():
+            days[int(dayDir.name[3:])] = solver
+
+    return days
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+_modules = {}
+def loadDay(solver:Path):
+    ''' Import a DayNN.py file as a module (once per worker process) '''
+
+    if solver not in _modules:
+        spec = importlib.util.spec_from_file_location(solver.stem, solver)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[solver] = module
+
+    return _modules[solver]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def runPart(solver:Path, part:str, inputName:str) -> Tuple[object, float]:
+    ''' Worker job: read a day's input and run one of its parts (or solve_both), timing it '''
+
+    module = loadDay(solver)
+    profiling.reset()
+
+    # Some solvers print progress as they go, keep that out of our report
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        inputs = module.read_input(solver.parent / inputName)
+        answer = profiling.run(f'{solver.stem}.{part}', getattr(module, part), inputs)
+        elapsed = time.perf_counter() - start
+
+    return answer, elapsed
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def profilePart(solver:Path, part:str, inputName:str) -> Tuple[object, float, dict]:
+    ''' Same as runPart, but also send back what profiling measured in this worker '''
+    answer, elapsed = runPart(solver, part, inputName)
+    return answer, elapsed, profiling.report()
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def runAll(days:List[int], workers:int, inputName:str, 
+           fused:bool=False) -> Dict[Tuple[int, str], Tuple[object, float]]:
+    ''' Fan every (day, part) pair (or every day's solve_both) out across a process pool '''
+
+    solvers = findDays()
+    missing = [day for day in days if day not in solvers]
+    if missing:
+        raise SystemExit(f'No solver found for day(s): {missing}')
+
+    # With profiling on, each job also hands back its phase timings and counters
+    job = profilePart if profiling.ENABLED else runPart
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for day in days:
+            for part in ((FUSED,) if fused else PARTS):
+                future = pool.submit(job, solvers[day], part, inputName)
+                futures[future] = (day, part)
+
+        # Just collect everything, the report gets printed in order afterwards
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    return results
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def main():
+
+    parser = argparse.ArgumentParser(description='Run every DayNN solver in parallel')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--days', type=int, nargs='+', default=None,
+                        help='which days to run (default: all of them)')
+    parser.add_argument('--input', default='input.txt',
+                        help='input file name inside each DayNN directory')
+    parser.add_argument('--fused', action='store_true',
+                        help="run each day's solve_both as a single job instead of each part")
+    parser.add_argument('--cache', action='store_true',
+                        help='turn on the parsed-input cache (same as AOC_CACHE=1)')
+    parser.add_argument('--profile', metavar='FILE', default=None,
+                        help="turn on profiling and write every job's JSON report to FILE")
+    parser.add_argument('--pstats', metavar='DIR', default=None,
+                        help='with --profile, also dump a cProfile .pstats file per job into DIR')
+    args = parser.parse_args()
+
+    # Workers inherit our environment, and the cache checks it on every call
+    if args.cache:
+        os.environ['AOC_CACHE'] = '1'
+
+    # Same for profiling, which has to be on before the pool starts up
+    if args.profile:
+        os.environ['AOC_PROFILE_OUT'] = args.profile
+        if args.pstats:
+            os.environ['AOC_PROFILE_PSTATS'] = args.pstats
+        profiling.enable()
+
+    days = args.days if args.days else list(findDays())
+
+    start = time.perf_counter()
+    results = runAll(days, args.workers, args.input, args.fused)
+    wall = time.perf_counter() - start
+
+    # Report in day order, regardless of what order the jobs finished in
+    for day in days:
+        if args.fused:
+            answers, elapsed = results[(day, FUSED)][:2]
+            for part, answer in enumerate(answers, 1):
+                print(f'Day{day:02d} part {part}: {str(answer):>20}  ({elapsed:8.3f} s for both)')
+            continue
+
+        for part in PARTS:
+            answer, elapsed = results[(day, part)][:2]
+            print(f'Day{day:02d} part {part[-1]}: {str(answer):>20}  ({elapsed:8.3f} s)')
+
+    serial = sum(result[1] for result in results.values())
+    print(f'Wall time: {wall:.3f} s (serial sum: {serial:.3f} s, workers: {args.workers})')
+
+    if args.profile:
+        profiling.dump('run_all', {f'Day{day:02d}.{part}': results[(day, part)][2]
+                                   for day, part in sorted(results)})
+
+    return
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+'''
+    What: Advent of Code 2024 - Shared on-disk cache for parsed inputs
+    Who: Josh Geiser
+
+    Turned on with AOC_CACHE=1 (or run_all.py --cache). Parsed structures get
+    marshal'd to AOC_CACHE_DIR (default: .aoc_cache/ in the repo), keyed by the
+    SHA-256 of the input contents plus the solver's name and version. Once the
+    directory gets bigger than AOC_CACHE_MAX_BYTES, the least recently used
+    entries get evicted.
+'''
+
+from pathlib import Path
+from typing import Callable, TypeVar
+import hashlib
+import marshal
+import os
+
+T = TypeVar('T')
+
+DEFAULT_DIR = Path(__file__).resolve().parent.parent / '.aoc_cache'
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def isEnabled() -> bool:
+    ''' Checked on every call, so the runner can flip it on for its workers '''
+    return os.environ.get('AOC_CACHE', '0') not in ('', '0')
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def cacheDir() -> Path:
+    return Path(os.environ.get('AOC_CACHE_DIR', DEFAULT_DIR))
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def getKey(name:str, version:int, content) -> str:
+    '''
+    SHA-256 of our input contents plus the solver name/version. Content can be
+    a loader view (hashed straight out of the mmap), raw bytes, or a list of lines
+    '''
+
+    if hasattr(content, 'content'):
+        content = content.content()
+    elif not isinstance(content, (bytes, bytearray, memoryview)):
+        content = '\n'.join(content).encode()
+
+    sha = hashlib.sha256(f'{name}:{version}:'.encode())
+    sha.update(content)
+    return sha.hexdigest()
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def evict(directory:Path, maxBytes:int):
+    ''' Delete least recently used entries until we fit under maxBytes '''
+
+    entries = []
+    for path in directory.glob('*.marshal'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= maxBytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
+
+    return
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def cached(name:str, version:int, content, parse:Callable[[], T]) -> T:
+    '''
+    Return parse(), loading it from our cache if we've parsed these exact inputs
+    before. Whatever parse() returns has to be marshal-able (ints, strs, tuples,
+    lists, dicts, sets), so callers convert to/from their own objects
+    '''
+
+    if not isEnabled():
+        return parse()
+
+    directory = cacheDir()
+    path = directory / f'{getKey(name, version, content)}.marshal'
+
+    # Cache hit: bump its mtime so LRU eviction knows it was just used
+    try:
+        with open(path, 'rb') as f:
+            data = marshal.load(f)
+        os.utime(path)
+        return data
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    # Cache miss: parse, then write to a temp file and rename so readers never
+    # see a half-written entry
+    data = parse()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            marshal.dump(data, f)
+        os.replace(tmp, path)
+        evict(directory, int(os.environ.get('AOC_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)))
+    except OSError:
+        pass
+
+    return data
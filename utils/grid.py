@@ -0,0 +1,84 @@
+'''
+    What: Advent of Code 2024 - Shared flat grid helper
+    Who: Josh Geiser
+'''
+
+from typing import Iterator, List, Tuple
+
+from utils import profiling
+
+# Value stored in every padded border cell, never a valid puzzle character
+SENTINEL = 0
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+class Grid():
+    '''
+    Helper class for a 2D character grid stored as one flat bytearray.
+
+    Each cell is addressed by a single integer index, and moving around is just
+    adding an offset (e.g., grid.UP == -grid.W). The grid gets a border of
+    SENTINEL cells "pad" wide, so stepping off the edge (by up to pad cells)
+    lands on a SENTINEL instead of needing a bounds check.
+    '''
+
+    @profiling.timed('parse')
+    def __init__(self, rows:List[str], pad:int=1):
+
+        # Loader views (Lines, GridView) hand us rows straight out of the input
+        # buffer, otherwise we've just got a list of strings
+        getRow = rows.raw if hasattr(rows, 'raw') else rows.__getitem__
+
+        self.M = len(rows)
+        self.N = len(getRow(0))
+        self.pad = pad
+        self.W = self.N + 2 * pad
+        self.cells = bytearray(self.W * (self.M + 2 * pad))
+
+        # Copy each row into its spot inside the padding
+        for r in range(self.M):
+            row = getRow(r)
+            start = self.index(r, 0)
+            self.cells[start:start+self.N] = row.encode() if isinstance(row, str) else row
+
+        # Neighbor offsets. DIRS4 is clockwise starting from UP
+        self.UP, self.RIGHT, self.DOWN, self.LEFT = -self.W, +1, +self.W, -1
+        self.DIRS4 = (self.UP, self.RIGHT, self.DOWN, self.LEFT)
+        self.DIRS8 = self.DIRS4 + (self.UP + self.RIGHT, self.DOWN + self.RIGHT,
+                                   self.DOWN + self.LEFT, self.UP + self.LEFT)
+
+    def index(self, r:int, c:int) -> int:
+        ''' (row, col) -> flat cell index '''
+        return (r + self.pad) * self.W + (c + self.pad)
+
+    def coord(self, i:int) -> Tuple[int, int]:
+        ''' Flat cell index -> (row, col) '''
+        r, c = divmod(i, self.W)
+        return r - self.pad, c - self.pad
+
+    def inBounds(self, r:int, c:int) -> bool:
+        ''' Is (row, col) inside the actual (unpadded) grid '''
+        return 0 <= r < self.M and 0 <= c < self.N
+
+    def __contains__(self, i:int) -> bool:
+        ''' So that we can do things like: if i in grid '''
+        return self.cells[i] != SENTINEL
+
+    def __getitem__(self, i:int) -> int:
+        return self.cells[i]
+
+    def __setitem__(self, i:int, val:int):
+        self.cells[i] = val
+
+    def find(self, ch:bytes) -> int:
+        ''' Index of the first cell holding ch, or -1 if there isn't one '''
+        return self.cells.find(ch)
+
+    def indices(self) -> Iterator[int]:
+        ''' Every index inside the actual grid, in row-major order '''
+        for r in range(self.M):
+            start = self.index(r, 0)
+            yield from range(start, start + self.N)
+
+    def rows(self) -> List[str]:
+        ''' Back to a list of strings, mostly just for debugging '''
+        return [self.cells[self.index(r, 0):self.index(r, self.N)].decode() for r in range(self.M)]
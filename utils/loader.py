@@ -0,0 +1,165 @@
+'''
+    What: Advent of Code 2024 - Shared zero-copy input loading
+    Who: Josh Geiser
+'''
+
+from array import array
+from typing import Iterator, Union
+import mmap
+import sys
+
+from utils import profiling
+
+Buffer = Union[bytes, mmap.mmap]
+
+# Default read size for streamChunks
+CHUNK_SIZE = 1 << 20
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def mapFile(infile) -> Buffer:
+    ''' Memory-map our input file read-only (mmap can't map an empty file though) '''
+
+    with open(infile, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b''
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('read')
+def readBuffer(infile) -> memoryview:
+    ''' The whole input file as one memoryview, for days that parse bytes directly '''
+    return memoryview(mapFile(infile))
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+class Lines():
+    '''
+    Lazily sliced lines over a buffer. Acts like the list of stripped strings our
+    old read_input gave back, but we only store where each line starts and ends,
+    and a line only gets decoded to a str when it is actually asked for.
+    '''
+
+    def __init__(self, buf:Buffer, starts:array=None, ends:array=None):
+        self.buf = buf
+        self.view = memoryview(buf)
+
+        # One pass over the buffer to find the (start, end) offsets of each line
+        if starts is None:
+            starts, ends = array('q'), array('q')
+            pos, size = 0, len(buf)
+            while pos < size:
+                end = buf.find(b'\n', pos)
+                if end == -1:
+                    end = size
+                starts.append(pos)
+                ends.append(end - 1 if end > pos and buf[end-1] == ord('\r') else end)
+                pos = end + 1
+
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        ''' A single line comes back as a str, a slice comes back as more Lines '''
+        if isinstance(i, slice):
+            return Lines(self.buf, self.starts[i], self.ends[i])
+        return str(self.view[self.starts[i]:self.ends[i]], 'utf-8').strip()
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def raw(self, i:int) -> memoryview:
+        ''' A single line as a memoryview into the buffer (no copies at all) '''
+        return self.view[self.starts[i]:self.ends[i]]
+
+    def content(self) -> memoryview:
+        ''' Everything from the start of our first line to the end of our last '''
+        if len(self) == 0:
+            return self.view[0:0]
+        return self.view[self.starts[0]:self.ends[-1]]
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+class GridView():
+    '''
+    Fixed-width 2D view over a buffer: every row is N characters plus a newline,
+    so row r just starts at r * stride and nothing needs to be split or copied
+    '''
+
+    def __init__(self, buf:Buffer):
+        self.buf = buf
+        self.view = memoryview(buf)
+
+        # The first newline tells us the width of every row
+        first = buf.find(b'\n')
+        if first == -1:
+            first = len(buf)
+        self.N = first - 1 if first > 0 and buf[first-1] == ord('\r') else first
+        self.stride = first + 1
+
+        # The last row may or may not have a trailing newline
+        self.M = (len(buf) + self.stride - self.N) // self.stride if self.N else 0
+
+    def __len__(self) -> int:
+        return self.M
+
+    def __getitem__(self, rc) -> int:
+        ''' So that we can do things like: view[r, c] '''
+        r, c = rc
+        return self.buf[r * self.stride + c]
+
+    def raw(self, r:int) -> memoryview:
+        ''' A single row as a memoryview into the buffer '''
+        start = r * self.stride
+        return self.view[start:start+self.N]
+
+    def content(self) -> memoryview:
+        return self.view
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('read')
+def read_input(infile) -> Lines:
+    ''' Drop-in replacement for each day's old read_input '''
+    return Lines(mapFile(infile))
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@profiling.timed('read')
+def readGrid(infile) -> GridView:
+    ''' For the grid days: the input file as a fixed-width 2D view '''
+    return GridView(mapFile(infile))
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def streamLines(infile) -> Iterator[str]:
+    ''' 
+    Yield one stripped line at a time from a file (or from stdin if infile is "-"),
+    so only the current line is ever held in memory
+    '''
+
+    if str(infile) == '-':
+        for line in sys.stdin:
+            yield line.strip()
+        return
+
+    with open(infile, 'r') as f:
+        for line in f:
+            yield line.strip()
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def streamChunks(infile, size:int=CHUNK_SIZE) -> Iterator[bytes]:
+    '''
+    Yield a file (or stdin if infile is "-") as raw byte chunks of up to size bytes,
+    for inputs that aren't really line oriented. Chunks can split anywhere, so
+    it's up to the caller to stitch together anything that straddles two
+    '''
+
+    if str(infile) == '-':
+        f = sys.stdin.buffer
+        while chunk := f.read(size):
+            yield chunk
+        return
+
+    with open(infile, 'rb') as f:
+        while chunk := f.read(size):
+            yield chunk
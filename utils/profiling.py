@@ -0,0 +1,115 @@
+'''
+    What: Advent of Code 2024 - Shared opt-in profiling hooks
+    Who: Josh Geiser
+
+    Turned on with AOC_PROFILE=1 (or run_all.py --profile). When it's on we time
+    each phase (read, parse, part1, part2, solve_both) and count hot-path events
+    in each solver, and report both as JSON. Phases are inclusive, so e.g. part1
+    includes any parsing done inside task_1. If AOC_PROFILE_PSTATS is set to a
+    directory, each run also gets a cProfile dump there for pstats/snakeviz.
+'''
+
+from pathlib import Path
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+
+ENABLED = os.environ.get('AOC_PROFILE', '0') not in ('', '0')
+
+counters = Counter()
+phases = defaultdict(float)
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def enable():
+    ''' Turn profiling on for us, and for any worker processes we start later '''
+    global ENABLED
+    ENABLED = True
+    os.environ['AOC_PROFILE'] = '1'
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def reset():
+    counters.clear()
+    phases.clear()
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def count(name:str, n:int=1):
+    '''
+    Bump a hot-path counter. Callers guard this with "if profiling.ENABLED:" so
+    the disabled case is just one attribute lookup
+    '''
+    counters[name] += n
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+@contextmanager
+def phase(name:str):
+    ''' So that we can do things like: with profiling.phase('parse'): ... '''
+
+    if not ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] += time.perf_counter() - start
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def timed(name:str):
+    ''' Decorator version of phase(), for timing a whole function '''
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def report() -> dict:
+    ''' Everything we've measured since the last reset() '''
+    return {'phases': dict(phases), 'counters': dict(counters)}
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def run(label:str, func, *args):
+    ''' Call func(*args), under cProfile if AOC_PROFILE_PSTATS points at a directory '''
+
+    outdir = os.environ.get('AOC_PROFILE_PSTATS')
+    if not (ENABLED and outdir):
+        return func(*args)
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(Path(outdir) / f'{label}.pstats')
+
+    return result
+
+#++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def dump(label:str, results:dict=None):
+    '''
+    Write our JSON report (or a dict of already collected reports) to the file
+    in AOC_PROFILE_OUT, or to stderr so it doesn't get mixed up with answers
+    '''
+
+    if not ENABLED:
+        return
+
+    text = json.dumps({label: results if results is not None else report()}, indent=2)
+    outfile = os.environ.get('AOC_PROFILE_OUT')
+    if outfile:
+        with open(outfile, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text, file=sys.stderr)
+
+    return